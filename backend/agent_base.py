@@ -1,10 +1,15 @@
 # backend/agent_base.py
 
+import asyncio
+from concurrent.futures import Executor
+from dataclasses import dataclass
 from typing import Dict, Any, Optional
 
+# Inputs and outputs are built per stage and per request; slots drop the per-instance __dict__.
+# eq=False keeps identity hashing, since the wrapped dict itself is not hashable.
+@dataclass(slots=True, frozen=True, eq=False)
 class AgentInput:
-    def __init__(self, data: Dict[str, Any]):
-        self.data = data
+    data: Dict[str, Any]
 
     @classmethod
     def from_text(cls, text: str) -> "AgentInput":
@@ -31,9 +36,9 @@ class AgentInput:
         return key in self.data
 
 
+@dataclass(slots=True, frozen=True, eq=False)
 class AgentOutput:
-    def __init__(self, data: Dict[str, Any]):
-        self.data = data
+    data: Dict[str, Any]
 
     @classmethod
     def from_text(cls, text: str) -> "AgentOutput":
@@ -70,6 +75,14 @@ class BaseAgent:
     def run(self, input_data: AgentInput) -> AgentOutput:
         raise NotImplementedError("Subclasses must implement this method.")
 
+    async def arun(self, input_data: AgentInput, executor: Optional[Executor] = None) -> AgentOutput:
+        """Awaitable run(); by default the blocking run() goes to `executor` (the loop's
+        default pool if None). Agents with native async clients override this."""
+        return await asyncio.get_running_loop().run_in_executor(executor, self.run, input_data)
+
+    def close(self) -> None:
+        """Release anything the agent holds across runs (sessions, threads); called on shutdown"""
+
     def get_input_keys(self) -> list:
         """Return the keys this agent expects from the workflow context"""
         return []
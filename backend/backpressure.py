@@ -0,0 +1,52 @@
+# backend/backpressure.py
+
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException
+
+
+class Backpressure:
+    """Admission control for heavy endpoints: at most `slots` requests run at once and at most
+    `queue` more wait for a slot; beyond that callers get an immediate 503 with Retry-After
+    instead of piling up behind long LLM runs"""
+
+    def __init__(self, slots: int, queue: int, retry_after: int = 30):
+        self._slots = asyncio.Semaphore(slots)
+        self._capacity = slots + queue
+        self._admitted = 0
+        self._reserved = 0
+        self.retry_after = retry_after
+
+    @property
+    def admitted(self) -> int:
+        """Requests currently running or waiting for a slot"""
+        return self._admitted
+
+    def _check_capacity(self) -> None:
+        if self._admitted + self._reserved >= self._capacity:
+            raise HTTPException(
+                status_code=503,
+                detail="Server is busy, please retry shortly",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+
+    def reserve(self) -> None:
+        """Hold a place for work that is accepted now but takes its slot later (a background
+        task), so a full server refuses it up front; the work hands the place back with
+        release_reservation() when it starts"""
+        self._check_capacity()
+        self._reserved += 1
+
+    def release_reservation(self) -> None:
+        self._reserved -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        self._check_capacity()
+        self._admitted += 1
+        try:
+            async with self._slots:
+                yield
+        finally:
+            self._admitted -= 1
@@ -2,20 +2,40 @@ import os
 import json
 import re
 import logging
-from typing import Dict, List, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 from datetime import datetime
 from dotenv import load_dotenv
-from openai import OpenAI
 from backend.agent_base import BaseAgent, AgentInput, AgentOutput
+from backend.llm_client import client
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+# Bounds concurrent OpenAI calls across all code generation runs in this process
+LLM_WORKERS = int(os.getenv("CODEGEN_LLM_WORKERS", "16"))
+
+# Independent OpenAI calls (docs, setup, per-file code and tests) run here concurrently
+_llm_pool = ThreadPoolExecutor(max_workers=LLM_WORKERS, thread_name_prefix="codegen-llm")
+
+def _timed(fn, *args):
+    """Call fn(*args) and return (result, elapsed seconds)"""
+    start = datetime.now()
+    result = fn(*args)
+    return result, (datetime.now() - start).total_seconds()
 
 class CodeGeneratorAgent(BaseAgent):
+    # Immutable fields shared by every error result; see _error()
+    _ERROR_TEMPLATE = {
+        "documentation": "",
+        "setup_instructions": "",
+        "api_docs": "",
+        "status": "error",
+    }
+
     def __init__(self):
         super().__init__()
         self.name = "AI Code Generator"
@@ -40,6 +60,24 @@ class CodeGeneratorAgent(BaseAgent):
         return ["generated_code", "test_files", "documentation", "setup_instructions", "api_docs"]
 
     def run(self, input_data: AgentInput) -> AgentOutput:
+        """Generate the complete project and return it as one result"""
+        data = {"generated_code": {}, "test_files": {}}
+        for event in self.iter_run(input_data):
+            kind = event.pop("event")
+            if kind == "file":
+                data["generated_code"][event["path"]] = event["content"]
+            elif kind == "test_file":
+                data["test_files"][event["path"]] = event["content"]
+            elif kind == "error":
+                return self._error(event["error"])
+            else:
+                data.update(event)
+        return AgentOutput.from_dict(data)
+
+    def iter_run(self, input_data: AgentInput) -> Iterator[Dict[str, Any]]:
+        """Generate the project, yielding each piece as soon as it exists: "architecture",
+        one "file"/"test_file" event per file, "documentation", "setup_instructions",
+        "api_docs", then "done" (or a single "error")"""
         start_time = datetime.now()
         logger.info("🚀 Starting code generation process")
         
@@ -50,35 +88,21 @@ class CodeGeneratorAgent(BaseAgent):
             complexity = input_data.get("complexity", "medium")
             include_tests = input_data.get("include_tests", True)
             
-            logger.info(f"📋 Input parameters: language={language}, framework={framework}, complexity={complexity}, include_tests={include_tests}")
-            logger.info(f"📝 Description length: {len(description)} characters")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("📋 Input parameters: language=%s, framework=%s, complexity=%s, include_tests=%s",
+                             language, framework, complexity, include_tests)
+                logger.debug("📝 Description: %r (%d characters)", description, len(description))
             
             if not description:
                 logger.warning("❌ No description provided")
-                return AgentOutput.from_dict({
-                    "generated_code": {},
-                    "test_files": {},
-                    "documentation": "",
-                    "setup_instructions": "",
-                    "api_docs": "",
-                    "status": "error",
-                    "error": "No description provided for code generation",
-                    "agent": self.name
-                })
+                yield {"event": "error", "error": "No description provided for code generation"}
+                return
 
             # Validate language support
             if language not in self.supported_languages:
                 logger.warning(f"❌ Unsupported language: {language}")
-                return AgentOutput.from_dict({
-                    "generated_code": {},
-                    "test_files": {},
-                    "documentation": "",
-                    "setup_instructions": "",
-                    "api_docs": "",
-                    "status": "error",
-                    "error": f"Unsupported language: {language}. Supported: {list(self.supported_languages.keys())}",
-                    "agent": self.name
-                })
+                yield {"event": "error", "error": f"Unsupported language: {language}. Supported: {list(self.supported_languages.keys())}"}
+                return
 
             logger.info("✅ Input validation passed")
 
@@ -88,76 +112,73 @@ class CodeGeneratorAgent(BaseAgent):
             architecture = self._generate_architecture(description, language, framework, complexity)
             arch_time = (datetime.now() - arch_start).total_seconds()
             logger.info(f"✅ Architecture generated in {arch_time:.2f} seconds")
+            yield {"event": "architecture", "architecture": architecture}
+
+            # Documentation and setup instructions only need the architecture: start them now
+            # so their OpenAI round trips overlap with code and test generation
+            logger.info("📚 Steps 4-5: Generating documentation and setup instructions in the background...")
+            doc_future = _llm_pool.submit(_timed, self._generate_documentation, description, language, framework, architecture)
+            setup_future = _llm_pool.submit(_timed, self._generate_setup_instructions, language, framework, architecture)
             
             # Generate main code files
             logger.info("💻 Step 2: Generating code files...")
             code_start = datetime.now()
-            generated_code = self._generate_code_files(description, language, framework, architecture)
+            generated_code = {}
+            for file_path, code_content in self._iter_code_files(description, language, framework, architecture):
+                generated_code[file_path] = code_content
+                yield {"event": "file", "path": file_path, "content": code_content}
             code_time = (datetime.now() - code_start).total_seconds()
             logger.info(f"✅ Code files generated in {code_time:.2f} seconds ({len(generated_code)} files)")
             
+            # API docs only need the code files; overlap them with test generation
+            logger.info("📖 Step 6: Generating API documentation in the background...")
+            api_future = _llm_pool.submit(_timed, self._generate_api_documentation, generated_code, language, architecture)
+
             # Generate test files if requested
-            test_files = {}
             if include_tests:
                 logger.info("🧪 Step 3: Generating test files...")
                 test_start = datetime.now()
-                test_files = self._generate_test_files(generated_code, language, architecture)
+                test_count = 0
+                for test_path, test_content in self._iter_test_files(generated_code, language, architecture):
+                    test_count += 1
+                    yield {"event": "test_file", "path": test_path, "content": test_content}
                 test_time = (datetime.now() - test_start).total_seconds()
-                logger.info(f"✅ Test files generated in {test_time:.2f} seconds ({len(test_files)} files)")
+                logger.info(f"✅ Test files generated in {test_time:.2f} seconds ({test_count} files)")
             else:
                 logger.info("⏭️ Step 3: Skipping test generation (not requested)")
-            
-            # Generate documentation
-            logger.info("📚 Step 4: Generating documentation...")
-            doc_start = datetime.now()
-            documentation = self._generate_documentation(description, language, framework, architecture)
-            doc_time = (datetime.now() - doc_start).total_seconds()
+
+            documentation, doc_time = doc_future.result()
             logger.info(f"✅ Documentation generated in {doc_time:.2f} seconds")
-            
-            # Generate setup instructions
-            logger.info("⚙️ Step 5: Generating setup instructions...")
-            setup_start = datetime.now()
-            setup_instructions = self._generate_setup_instructions(language, framework, architecture)
-            setup_time = (datetime.now() - setup_start).total_seconds()
+            yield {"event": "documentation", "documentation": documentation}
+            setup_instructions, setup_time = setup_future.result()
             logger.info(f"✅ Setup instructions generated in {setup_time:.2f} seconds")
-            
-            # Generate API documentation if applicable
-            logger.info("📖 Step 6: Generating API documentation...")
-            api_start = datetime.now()
-            api_docs = self._generate_api_documentation(generated_code, language, architecture)
-            api_time = (datetime.now() - api_start).total_seconds()
+            yield {"event": "setup_instructions", "setup_instructions": setup_instructions}
+            api_docs, api_time = api_future.result()
             logger.info(f"✅ API documentation generated in {api_time:.2f} seconds")
+            yield {"event": "api_docs", "api_docs": api_docs}
 
             total_time = (datetime.now() - start_time).total_seconds()
             logger.info(f"🎉 Code generation completed successfully in {total_time:.2f} seconds")
             logger.info(f"⏱️ Time breakdown: arch={arch_time:.1f}s, code={code_time:.1f}s, tests={test_time if include_tests else 0:.1f}s, docs={doc_time:.1f}s, setup={setup_time:.1f}s, api={api_time:.1f}s")
 
-            return AgentOutput.from_dict({
-                "generated_code": generated_code,
-                "test_files": test_files,
-                "documentation": documentation,
-                "setup_instructions": setup_instructions,
-                "api_docs": api_docs,
-                "architecture": architecture,
+            yield {
+                "event": "done",
                 "language": language,
                 "framework": framework,
                 "status": "completed",
                 "agent": self.name
-            })
+            }
 
         except Exception as e:
             total_time = (datetime.now() - start_time).total_seconds()
             logger.error(f"💥 Code generation failed after {total_time:.2f} seconds: {str(e)}")
-            return AgentOutput.from_dict({
-                "generated_code": {},
-                "test_files": {},
-                "documentation": "",
-                "setup_instructions": "",
-                "api_docs": "",
-                "status": "error",
-                "error": str(e),
-                "agent": self.name
-            })
+            yield {"event": "error", "error": str(e)}
+
+    def _error(self, message: str) -> AgentOutput:
+        """Build an error result from the shared template; mutable containers are always fresh"""
+        data = self._ERROR_TEMPLATE.copy()
+        data.update(generated_code={}, test_files={}, error=message, agent=self.name)
+        return AgentOutput.from_dict(data)
 
     def _generate_architecture(self, description: str, language: str, framework: str, complexity: str) -> Dict[str, Any]:
         """Generate code architecture and structure"""
@@ -216,10 +237,10 @@ Return only valid JSON.
             logger.error(f"❌ Architecture generation failed after {api_time:.2f} seconds: {str(e)}")
             return self._get_fallback_architecture(language, complexity)
 
-    def _generate_code_files(self, description: str, language: str, framework: str, architecture: Dict[str, Any]) -> Dict[str, str]:
-        """Generate main code files"""
+    def _iter_code_files(self, description: str, language: str, framework: str, architecture: Dict[str, Any]) -> Iterator[Tuple[str, str]]:
+        """Generate main code files, yielding (path, content) in project order as each is ready"""
         logger.info("💻 Starting code file generation...")
-        code_files = {}
+        file_count = 0
         
         try:
             # Get file structure from architecture
@@ -228,34 +249,33 @@ Return only valid JSON.
             
             logger.info(f"📁 Project structure: {len(project_structure)} files to generate")
 
-            for i, file_path in enumerate(project_structure):
-                if self._is_code_file(file_path, language):
-                    logger.info(f"📄 Generating file {i+1}/{len(project_structure)}: {file_path}")
-                    file_start = datetime.now()
-                    
-                    code_content = self._generate_single_file(
-                        file_path, description, language, framework, architecture
-                    )
-                    
-                    file_time = (datetime.now() - file_start).total_seconds()
-                    logger.info(f"✅ File {file_path} generated in {file_time:.2f} seconds ({len(code_content)} chars)")
-                    
-                    code_files[file_path] = code_content
+            # Each file is its own OpenAI round trip and none depends on another: request them together
+            file_paths = [path for path in project_structure if self._is_code_file(path, language)]
+            futures = [
+                _llm_pool.submit(_timed, self._generate_single_file, file_path, description, language, framework, architecture)
+                for file_path in file_paths
+            ]
+            for file_path, future in zip(file_paths, futures):
+                code_content, file_time = future.result()
+                logger.info(f"✅ File {file_path} generated in {file_time:.2f} seconds ({len(code_content)} chars)")
+                file_count += 1
+                yield file_path, code_content
 
             # Ensure we have at least a main file
-            if not code_files:
+            if not file_count:
                 logger.warning("⚠️ No code files generated, creating fallback main file")
                 main_file = f"main{self.supported_languages[language]['ext']}"
-                code_files[main_file] = self._generate_main_file(description, language, framework)
+                file_count += 1
+                yield main_file, self._generate_main_file(description, language, framework)
 
         except Exception as e:
             logger.error(f"❌ Code file generation error: {str(e)}")
             # Fallback: generate a simple main file
             main_file = f"main{self.supported_languages[language]['ext']}"
-            code_files[main_file] = self._generate_fallback_code(description, language)
+            file_count += 1
+            yield main_file, self._generate_fallback_code(description, language)
 
-        logger.info(f"✅ Code file generation completed: {len(code_files)} files")
-        return code_files
+        logger.info(f"✅ Code file generation completed: {file_count} files")
 
     def _generate_single_file(self, file_path: str, description: str, language: str, framework: str, architecture: Dict[str, Any]) -> str:
         """Generate code for a single file"""
@@ -304,37 +324,33 @@ Generate only the code content, no explanations.
             logger.error(f"❌ Single file generation failed for {file_path} after {api_time:.2f} seconds: {str(e)}")
             return f"# Error generating code for {file_path}: {str(e)}\n# TODO: Implement {file_path}"
 
-    def _generate_test_files(self, code_files: Dict[str, str], language: str, architecture: Dict[str, Any]) -> Dict[str, str]:
-        """Generate comprehensive test files"""
+    def _iter_test_files(self, code_files: Dict[str, str], language: str, architecture: Dict[str, Any]) -> Iterator[Tuple[str, str]]:
+        """Generate comprehensive test files, yielding (path, content) as each is ready"""
         logger.info("🧪 Starting test file generation...")
-        test_files = {}
+        test_count = 0
         test_framework = self.supported_languages[language]['test_framework']
         
         try:
-            test_count = 0
-            for file_path, code_content in code_files.items():
-                if self._should_generate_tests(file_path):
-                    test_count += 1
-                    logger.info(f"🧪 Generating test {test_count} for {file_path}")
-                    test_start = datetime.now()
-                    
-                    test_file_path = self._get_test_file_path(file_path, language)
-                    test_content = self._generate_test_content(
-                        file_path, code_content, language, test_framework, architecture
-                    )
-                    
-                    test_time = (datetime.now() - test_start).total_seconds()
-                    logger.info(f"✅ Test for {file_path} generated in {test_time:.2f} seconds")
-                    
-                    test_files[test_file_path] = test_content
+            # Tests for different files are independent; generate them concurrently, keeping file order
+            tested = [(path, code) for path, code in code_files.items() if self._should_generate_tests(path)]
+            logger.info(f"🧪 Generating tests for {len(tested)} files")
+            futures = [
+                _llm_pool.submit(_timed, self._generate_test_content, file_path, code_content, language, test_framework, architecture)
+                for file_path, code_content in tested
+            ]
+            for (file_path, _), future in zip(tested, futures):
+                test_content, test_time = future.result()
+                logger.info(f"✅ Test for {file_path} generated in {test_time:.2f} seconds")
+                test_count += 1
+                yield self._get_test_file_path(file_path, language), test_content
 
         except Exception as e:
             logger.error(f"❌ Test file generation error: {str(e)}")
             # Generate basic test file
-            test_files[f"test_main{self.supported_languages[language]['ext']}"] = self._generate_basic_test(language, test_framework)
+            test_count += 1
+            yield f"test_main{self.supported_languages[language]['ext']}", self._generate_basic_test(language, test_framework)
 
-        logger.info(f"✅ Test file generation completed: {len(test_files)} test files")
-        return test_files
+        logger.info(f"✅ Test file generation completed: {test_count} test files")
 
     def _generate_test_content(self, file_path: str, code_content: str, language: str, test_framework: str, architecture: Dict[str, Any]) -> str:
         """Generate test content for a specific file"""
@@ -1,11 +1,28 @@
 import sqlite3
 import json
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
 import logging
+from google.cloud import bigquery
 
 logger = logging.getLogger(__name__)
 
+def _results_cursor(relevance_score: float, result_id: int) -> str:
+    """Opaque position of a result in relevance order: its score and id"""
+    return f"{relevance_score!r}:{result_id}"
+
+class InvalidCursor(ValueError):
+    """A results cursor that get_query_results did not hand out"""
+
+def _parse_results_cursor(value: str) -> Tuple[float, int]:
+    """Inverse of _results_cursor; raises InvalidCursor for anything it did not produce"""
+    score, _, result_id = value.rpartition(":")
+    try:
+        return float(score), int(result_id)
+    except ValueError:
+        raise InvalidCursor(value) from None
+
 class ResearchDatabase:
     def __init__(self, db_path: str = "research_data.db"):
         self.db_path = db_path
@@ -71,6 +88,16 @@ class ResearchDatabase:
                     )
                 """)
                 
+                # Paging orders and seeks on the score, so rows saved before a score was always
+                # written get the same 0 that save_results now stores for a missing one
+                cursor.execute("UPDATE research_results SET relevance_score = 0 WHERE relevance_score IS NULL")
+                
+                # Results are listed per query by relevance; serves the counts and keyset pages
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_research_results_query_relevance
+                    ON research_results (query_id, relevance_score DESC, id)
+                """)
+                
                 conn.commit()
                 logger.info("Database initialized successfully")
                 
@@ -109,7 +136,8 @@ class ResearchDatabase:
                         result.get('content', ''),
                         result.get('source', ''),
                         result.get('url', ''),
-                        result.get('relevance_score', 0.0),
+                        # Relevance orders and pages results, so a missing score is stored as 0
+                        result.get('relevance_score') or 0.0,
                         result.get('data_type', 'text'),
                         json.dumps(result.get('metadata', {}))
                     ))
@@ -150,10 +178,16 @@ class ResearchDatabase:
         except Exception as e:
             logger.error(f"Failed to set cache: {e}")
 
-    def get_query_results(self, query_id: int, page: int = 1, page_size: int = 20) -> Dict[str, Any]:
-        """Get paginated results for a query"""
+    def get_query_results(self, query_id: int, page: int = 1, page_size: int = 20,
+                          after: Optional[str] = None) -> Dict[str, Any]:
+        """Get paginated results for a query, most relevant first.
+
+        Pass the previous page's `next_cursor` as `after` to seek straight to the next page
+        through the index instead of counting past `page` with OFFSET.
+        """
+        if after is not None:
+            after_score, after_id = _parse_results_cursor(after)
         try:
-            offset = (page - 1) * page_size
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 
@@ -162,34 +196,48 @@ class ResearchDatabase:
                 total_count = cursor.fetchone()[0]
                 
                 # Get paginated results
-                cursor.execute("""
-                    SELECT title, content, source, url, relevance_score, data_type, metadata, created_at
-                    FROM research_results 
-                    WHERE query_id = ?
-                    ORDER BY relevance_score DESC, created_at DESC
-                    LIMIT ? OFFSET ?
-                """, (query_id, page_size, offset))
+                if after is not None:
+                    cursor.execute("""
+                        SELECT id, title, content, source, url, relevance_score, data_type, metadata, created_at
+                        FROM research_results
+                        WHERE query_id = ?
+                          AND (relevance_score < ? OR (relevance_score = ? AND id > ?))
+                        ORDER BY relevance_score DESC, id ASC
+                        LIMIT ?
+                    """, (query_id, after_score, after_score, after_id, page_size))
+                else:
+                    cursor.execute("""
+                        SELECT id, title, content, source, url, relevance_score, data_type, metadata, created_at
+                        FROM research_results
+                        WHERE query_id = ?
+                        ORDER BY relevance_score DESC, id ASC
+                        LIMIT ? OFFSET ?
+                    """, (query_id, page_size, (page - 1) * page_size))
+                rows = cursor.fetchall()
                 
                 results = []
-                for row in cursor.fetchall():
+                for row in rows:
                     results.append({
-                        'title': row[0],
-                        'content': row[1],
-                        'source': row[2],
-                        'url': row[3],
-                        'relevance_score': row[4],
-                        'data_type': row[5],
-                        'metadata': json.loads(row[6]) if row[6] else {},
-                        'created_at': row[7]
+                        'title': row[1],
+                        'content': row[2],
+                        'source': row[3],
+                        'url': row[4],
+                        'relevance_score': row[5],
+                        'data_type': row[6],
+                        'metadata': json.loads(row[7]) if row[7] else {},
+                        'created_at': row[8]
                     })
                 
-                return {
+                response = {
                     'results': results,
                     'total_count': total_count,
-                    'page': page,
                     'page_size': page_size,
-                    'total_pages': (total_count + page_size - 1) // page_size
+                    'total_pages': (total_count + page_size - 1) // page_size,
+                    'next_cursor': _results_cursor(rows[-1][5], rows[-1][0]) if len(rows) == page_size else None
                 }
+                if after is None:
+                    response['page'] = page
+                return response
         except Exception as e:
             logger.error(f"Failed to get query results: {e}")
             raise
@@ -229,16 +277,20 @@ class ResearchDatabase:
         except Exception as e:
             logger.error(f"Failed to get recent queries: {e}")
             return []
-        
-   # BigQuery logging
-from google.cloud import bigquery
-from datetime import datetime
-import json
+
+
+# BigQuery logging
+BIGQUERY_TABLE_ID = "ai-content-studio-462020.ai_content_logs.content_logs"
+
+@lru_cache(maxsize=1)
+def _bigquery_client() -> bigquery.Client:
+    """One client per process: construction resolves credentials and builds an HTTP session"""
+    return bigquery.Client()
 
 def log_workflow_to_bigquery(context: dict, prompt: str):
-    client = bigquery.Client()
+    client = _bigquery_client()
 
-    table_id = "ai-content-studio-462020.ai_content_logs.content_logs"
+    table_id = BIGQUERY_TABLE_ID
     now = datetime.utcnow().isoformat()
 
     # Extract durations individually for RECORD fields
@@ -262,9 +314,9 @@ def log_workflow_to_bigquery(context: dict, prompt: str):
 
     errors = client.insert_rows_json(table_id, [row])
     if errors:
-        print("❌ BigQuery insert error:", errors)
+        logger.error("❌ BigQuery insert error: %s", errors)
     else:
-        print("✅ Logged to BigQuery:", row["campaign_theme"])
+        logger.debug("✅ Logged to BigQuery: %s", row["campaign_theme"])
 
 
 
@@ -1,10 +1,27 @@
 import yaml
-import traceback
-from typing import Dict, Any, List
+import hashlib
+import logging
+import orjson
+import threading
+import warnings
+from typing import Dict, Any, Iterator, List
 from backend.agent_base import AgentInput, BaseAgent, AgentOutput
+from backend.cache import TTLCache
 from importlib import import_module
 from time import time
 
+# Prefer the libyaml-backed loader when PyYAML was built with it; same semantics as SafeLoader.
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+logger = logging.getLogger(__name__)
+
+# A stage whose agent sees exactly the same input again reuses the earlier output instead of
+# repeating its LLM and API calls
+STAGE_CACHE_TTL = 60 * 60
+# Only outputs that report success are reused: "completed", or no status at all from agents that
+# raise on failure. Degraded results such as research_data's "fallback" are recomputed next time.
+CACHEABLE_STAGE_STATUSES = frozenset({None, "completed"})
+
 class WorkflowResult:
     def __init__(self, success: bool, context: Dict[str, Any], error: str = None):
         self.success = success
@@ -23,18 +40,58 @@ class WorkflowResult:
 class AgentExecutor:
     def __init__(self, task_path: str):
         with open(task_path, "r") as f:
-            task = yaml.safe_load(f)
+            task = yaml.load(f, Loader=YamlLoader)
         
         self.entry_point = task["entry_point"]
         self.agent_specs = task["agents"]
         self.workflow = task.get("workflow", {})
         self._agent_cache = {}
+        # Handlers run agents from worker threads; build each agent exactly once
+        self._agent_lock = threading.Lock()
+        self._stage_cache = TTLCache(maxsize=512, ttl=STAGE_CACHE_TTL)
+        # Separate from the load lock, which is held while an agent is being constructed
+        self._stats_lock = threading.Lock()
+        self.stage_cache_hits = 0
+        self.stage_cache_misses = 0
+
+    def get_agent(self, agent_id: str) -> BaseAgent:
+        """Return the shared instance of an agent, loading it on first use"""
+        return self._load_agent(agent_id)
+
+    def warm_up(self) -> List[str]:
+        """Load every configured agent up front; returns the ids that failed to load"""
+        failed = []
+        for agent_id in self.agent_specs:
+            try:
+                self._load_agent(agent_id)
+            except Exception as e:
+                logger.warning("⚠️ Could not preload agent '%s': %s", agent_id, e)
+                failed.append(agent_id)
+        return failed
+
+    def close(self) -> None:
+        """Close every loaded agent; failures are logged so the rest still get closed"""
+        with self._agent_lock:
+            agents = list(self._agent_cache.items())
+        for agent_id, agent_instance in agents:
+            try:
+                agent_instance.close()
+            except Exception as e:
+                logger.warning("⚠️ Could not close agent '%s': %s", agent_id, e)
 
     def _load_agent(self, agent_id: str) -> BaseAgent:
         """Load and cache agent instances"""
-        if agent_id in self._agent_cache:
+        agent_instance = self._agent_cache.get(agent_id)
+        if agent_instance is not None:
+            return agent_instance
+
+        with self._agent_lock:
+            if agent_id not in self._agent_cache:
+                self._agent_cache[agent_id] = self._create_agent(agent_id)
             return self._agent_cache[agent_id]
 
+    def _create_agent(self, agent_id: str) -> BaseAgent:
+        """Import an agent's module and instantiate its class from task.yaml"""
         if agent_id not in self.agent_specs:
             raise ValueError(f"Agent '{agent_id}' not found in task.yaml")
 
@@ -46,20 +103,68 @@ class AgentExecutor:
         except ImportError as e:
             raise ValueError(f"Could not import module {module_path}: {e}")
         
-        # Find the agent class
-        agent_class = None
-        for obj_name in dir(agent_module):
-            obj = getattr(agent_module, obj_name)
-            if isinstance(obj, type) and issubclass(obj, BaseAgent) and obj is not BaseAgent:
-                agent_class = obj
-                break
+        # Resolve the agent class named in task.yaml; scan the module only for legacy specs
+        class_name = spec.get("class_name")
+        if class_name:
+            agent_class = getattr(agent_module, class_name, None)
+            if not (isinstance(agent_class, type) and issubclass(agent_class, BaseAgent)):
+                raise ValueError(f"Agent class '{class_name}' not found in module {module_path}")
+        else:
+            warnings.warn(
+                f"Agent '{agent_id}' has no class_name in task.yaml; discovering it by scanning "
+                f"{module_path} is deprecated",
+                DeprecationWarning,
+                stacklevel=3,
+            )
+            agent_class = None
+            for obj_name in dir(agent_module):
+                obj = getattr(agent_module, obj_name)
+                if isinstance(obj, type) and issubclass(obj, BaseAgent) and obj is not BaseAgent:
+                    agent_class = obj
+                    break
+
+            if agent_class is None:
+                raise ValueError(f"No agent class found in module {module_path}")
 
-        if agent_class is None:
-            raise ValueError(f"No agent class found in module {module_path}")
+        return agent_class()
+
+    def _stage_key(self, agent_id: str, agent_input: AgentInput):
+        """Content hash of a stage's agent and input, or None if the input is not plain JSON"""
+        try:
+            material = orjson.dumps([agent_id, agent_input.data], option=orjson.OPT_SORT_KEYS)
+        except TypeError:
+            return None
+        return hashlib.blake2b(material, digest_size=16).hexdigest()
 
-        agent_instance = agent_class()
-        self._agent_cache[agent_id] = agent_instance
-        return agent_instance
+    def _run_stage(self, agent_id: str, agent_instance: BaseAgent, agent_input: AgentInput) -> AgentOutput:
+        """Run one stage's agent, serving repeated inputs from the stage cache"""
+        key = self._stage_key(agent_id, agent_input)
+        if key is not None:
+            cached = self._stage_cache.get(key)
+            with self._stats_lock:
+                if cached is not None:
+                    self.stage_cache_hits += 1
+                else:
+                    self.stage_cache_misses += 1
+            # Entries are stored serialized, so each hit hands the workflow its own copy; later
+            # stages and the response caches share the context and must not reach the cached data
+            if cached is not None:
+                return AgentOutput(orjson.loads(cached))
+
+        agent_output = agent_instance.run(agent_input)
+        if key is not None and agent_output.data.get("status") in CACHEABLE_STAGE_STATUSES:
+            try:
+                self._stage_cache.set(key, orjson.dumps(agent_output.data))
+            except TypeError:
+                pass  # not plain JSON; run this stage again next time
+        return agent_output
+
+    def stage_cache_info(self) -> Dict[str, int]:
+        return {
+            "hits": self.stage_cache_hits,
+            "misses": self.stage_cache_misses,
+            "size": len(self._stage_cache),
+        }
 
     def run_agent(self, agent_id: str, input_data: AgentInput = None) -> AgentOutput:
         """Run a single agent (legacy method for backward compatibility)"""
@@ -79,6 +184,13 @@ class AgentExecutor:
 
     def run_workflow(self, initial_input: str) -> WorkflowResult:
         """Execute the complete workflow with all agents in sequence"""
+        for event in self.iter_workflow(initial_input):
+            if event["event"] == "result":
+                return event["result"]
+
+    def iter_workflow(self, initial_input: str) -> Iterator[Dict[str, Any]]:
+        """Execute the workflow, yielding a "stage" event as each stage finishes and a final
+        "result" event carrying the WorkflowResult"""
         context = {"text": initial_input}
         stages_completed = []
         context["agents_run"] = {}
@@ -92,7 +204,7 @@ class AgentExecutor:
                 agent_id = stage["agent"]
                 stage_name = stage.get("name", agent_id)
                 
-                print(f"🔄 Executing stage: {stage_name} (Agent: {agent_id})")
+                logger.info("🔄 Executing stage: %s (Agent: %s)", stage_name, agent_id)
                 
                 # Get agent specification
                 agent_spec = self.agent_specs.get(agent_id, {})
@@ -108,38 +220,40 @@ class AgentExecutor:
                 try:
                     # Execute the agent                    ...
                     start_time = time()
-                    agent_output = agent_instance.run(agent_input)
+                    agent_output = self._run_stage(agent_id, agent_instance, agent_input)
                     duration = round(time() - start_time, 2)
 
                     # Track stage duration
                     context["stage_durations"][agent_id] = duration
 
-                    # Save agent's result
+                    # Record a summary only; the output itself lives once, at the top level of context
+                    output_keys = list(agent_output.data.keys())
                     context["agents_run"][agent_id] = {
-                    "status": "completed",
-                    "output": agent_output.data  # or use `.to_json()` if more appropriate
-}
+                        "status": "completed",
+                        "output_keys": output_keys
+                    }
             
                     agent_instance.status = "completed"
                     
-                    # Update context with agent's output
-                    context = agent_output.update_context(context)
+                    # Merge agent's output into the shared context in place
+                    context.update(agent_output.data)
                     
                     # Track completed stage
                     stage_info = {
                         "agent_id": agent_id,
                         "stage_name": stage_name,
                         "status": "completed",
-                        "output_keys": list(agent_output.data.keys())
+                        "output_keys": output_keys
                     }
                     stages_completed.append(stage_info)
                     
-                    print(f"✅ Completed stage: {stage_name}")
+                    logger.info("✅ Completed stage: %s", stage_name)
+                    yield {"event": "stage", "stage": stage_info, "data": agent_output.data}
                     
                 except Exception as e:
                     agent_instance.status = "error"
                     error_msg = f"Error in stage '{stage_name}': {str(e)}"
-                    print(f"❌ {error_msg}")
+                    logger.exception("❌ %s", error_msg)
                     
                     stage_info = {
                         "agent_id": agent_id,
@@ -149,25 +263,25 @@ class AgentExecutor:
                     }
                     stages_completed.append(stage_info)
                     
-                    return WorkflowResult(
+                    yield {"event": "result", "result": WorkflowResult(
                         success=False,
                         context=context,
                         error=error_msg
-                    )
+                    )}
+                    return
             
-            print("🎉 Workflow completed successfully!")
+            logger.info("🎉 Workflow completed successfully!")
             result = WorkflowResult(success=True, context=context)
             result.stages_completed = stages_completed
-            return result
+            yield {"event": "result", "result": result}
             
         except Exception as e:
             error_msg = f"Workflow execution failed: {str(e)}"
-            print(f"💥 {error_msg}")
-            traceback.print_exc()
+            logger.exception("💥 %s", error_msg)
             
             result = WorkflowResult(success=False, context=context, error=error_msg)
             result.stages_completed = stages_completed
-            return result
+            yield {"event": "result", "result": result}
 
     def get_workflow_info(self) -> Dict[str, Any]:
         """Get information about the configured workflow"""
@@ -1,116 +1,475 @@
 import requests
-from bs4 import BeautifulSoup
-import feedparser
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import orjson
+from lxml import etree
 import asyncio
 import aiohttp
-from typing import List, Dict, Any
+import threading
+from time import monotonic
+from urllib.parse import quote, urlencode, urlsplit
+from typing import Awaitable, Callable, List, Dict, Any, Optional, TypeVar
 import logging
 
+from backend.cache import SingleFlight, TTLCache
+
 logger = logging.getLogger(__name__)
 
+# --- Shared HTTP Clients (keep-alive connection pools) ---
+# Transient failures (connection errors, 429 and 5xx) are retried with exponential backoff.
+RETRY_ATTEMPTS = 3
+RETRY_BACKOFF_BASE = 0.2
+RETRY_BACKOFF_MAX = 2.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+_sync_retry = Retry(total=RETRY_ATTEMPTS - 1, backoff_factor=RETRY_BACKOFF_BASE, status_forcelist=RETRY_STATUSES)
+_http = requests.Session()
+_http.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=_sync_retry))
+_http.mount("http://", HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=_sync_retry))
+
+# Applied per request so borrowed sessions (e.g. the app-wide pool) get the same bounds
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10, connect=3, sock_read=5)
+
+# aiohttp sessions are bound to the loop they were created on, so there is one per loop
+_sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+_sessions_lock = threading.Lock()
+
+def _prune_sessions() -> None:
+    """Forget sessions whose loop has closed; call with _sessions_lock held. Their loop can no
+    longer run close(), so the connector is detached rather than left to warn when collected."""
+    for loop in [loop for loop in _sessions if loop.is_closed()]:
+        _sessions.pop(loop).detach()
+
+async def get_session() -> aiohttp.ClientSession:
+    """Return the aiohttp session for the running loop, creating it lazily"""
+    loop = asyncio.get_running_loop()
+    with _sessions_lock:
+        session = _sessions.get(loop)
+        if session is None or session.closed:
+            _prune_sessions()
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=100, limit_per_host=20, ttl_dns_cache=300, keepalive_timeout=60),
+                timeout=REQUEST_TIMEOUT,
+            )
+            _sessions[loop] = session
+        return session
+
+async def close_session() -> None:
+    """Close every module-wide aiohttp session (call on application shutdown)"""
+    loop = asyncio.get_running_loop()
+    with _sessions_lock:
+        _prune_sessions()
+        sessions = list(_sessions.items())
+        _sessions.clear()
+    for session_loop, session in sessions:
+        if session.closed:
+            continue
+        if session_loop is loop:
+            await session.close()
+        elif session_loop.is_running():
+            # Closed on its own loop; not awaited so a busy loop cannot stall shutdown
+            asyncio.run_coroutine_threadsafe(session.close(), session_loop)
+        else:
+            session.detach()
+
+# --- Retries and Circuit Breaking (async fetches) ---
+T = TypeVar("T")
+
+class CircuitOpenError(Exception):
+    """Raised instead of contacting a host whose circuit breaker is open"""
+
+class CircuitBreaker:
+    """Open after `fail_max` consecutive failed calls and reject calls for `reset_timeout`
+    seconds; after that a trial call is let through and a success closes the circuit again"""
+
+    def __init__(self, fail_max: int = 5, reset_timeout: float = 30):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def before_call(self, host: str) -> None:
+        with self._lock:
+            if self._opened_at is not None and monotonic() - self._opened_at < self.reset_timeout:
+                raise CircuitOpenError(f"Circuit open for {host}; skipping request")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.fail_max:
+                self._opened_at = monotonic()
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+def _breaker_for(host: str) -> CircuitBreaker:
+    breaker = _breakers.get(host)
+    if breaker is None:
+        breaker = _breakers.setdefault(host, CircuitBreaker())
+    return breaker
+
+def _is_retryable_status(status: int) -> bool:
+    return status in RETRY_STATUSES
+
+def _is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return _is_retryable_status(exc.status)
+    return isinstance(exc, (aiohttp.ClientError, asyncio.TimeoutError))
+
+async def _with_retries(host: str, attempt: Callable[[], Awaitable[T]]) -> T:
+    """Run `attempt` behind the host's circuit breaker, retrying transient failures with backoff"""
+    breaker = _breaker_for(host)
+    breaker.before_call(host)
+    delay = RETRY_BACKOFF_BASE
+    for attempt_no in range(1, RETRY_ATTEMPTS + 1):
+        try:
+            result = await attempt()
+        except Exception as e:
+            if not _is_retryable(e):
+                raise
+            if attempt_no == RETRY_ATTEMPTS:
+                breaker.record_failure()
+                raise
+            logger.warning(f"Retrying {host} after attempt {attempt_no} failed: {e!r}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RETRY_BACKOFF_MAX)
+        else:
+            breaker.record_success()
+            return result
+
+# --- Result Caches ---
+# Wikipedia summaries change slowly; arXiv listings update once a day.
+WIKIPEDIA_CACHE_TTL = 600
+ARXIV_CACHE_TTL = 24 * 60 * 60
+
+# Failures (4xx, exhausted retries, open circuit) are remembered briefly so a burst of
+# identical queries does not keep hitting a source that just said no.
+NEGATIVE_CACHE_TTL = 60
+
+_wikipedia_cache = TTLCache(maxsize=1024, ttl=WIKIPEDIA_CACHE_TTL)
+_arxiv_cache = TTLCache(maxsize=1024, ttl=ARXIV_CACHE_TTL)
+
+# Identical lookups already in flight are joined rather than sent again
+_inflight = SingleFlight()
+
+# Validators outlive the fresh entries above so an expired result can be
+# revalidated with a conditional request instead of re-downloading the body.
+VALIDATOR_CACHE_TTL = 7 * 24 * 60 * 60
+
+_validators = TTLCache(maxsize=2048, ttl=VALIDATOR_CACHE_TTL)
+
+def _conditional_headers(key) -> Dict[str, str]:
+    """Build If-None-Match / If-Modified-Since headers from a previously stored response"""
+    headers = {}
+    entry = _validators.get(key)
+    if entry is not None:
+        _, etag, last_modified = entry
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+    return headers
+
+def _remember_validators(key, body: Any, response_headers) -> None:
+    etag = response_headers.get("ETag")
+    last_modified = response_headers.get("Last-Modified")
+    if etag or last_modified:
+        _validators.set(key, (body, etag, last_modified))
+
+def _revalidated_body(key) -> Any:
+    """Return the body stored alongside the validators, or None if it was evicted"""
+    entry = _validators.get(key)
+    return None if entry is None else entry[0]
+
+# --- Source URLs (escaped once; queries may contain '&', '#', '/' or non-ASCII) ---
+WIKIPEDIA_SUMMARY_URL = "https://en.wikipedia.org/api/rest_v1/page/summary/"
+ARXIV_QUERY_URL = "http://export.arxiv.org/api/query"
+
+def _wikipedia_summary_url(query: str) -> str:
+    return WIKIPEDIA_SUMMARY_URL + quote(query.replace(" ", "_"), safe="")
+
+def _arxiv_query_url(query: str, max_results: int) -> str:
+    return ARXIV_QUERY_URL + "?" + urlencode({"search_query": f"all:{query}", "start": 0, "max_results": max_results})
+
+# --- arXiv Atom Parsing (incremental, libxml2) ---
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+FEED_CHUNK_SIZE = 8192
+
+def _new_arxiv_parser() -> etree.XMLPullParser:
+    return etree.XMLPullParser(events=("end",), tag=f"{ATOM_NS}entry")
+
+def _drain_arxiv_entries(parser: etree.XMLPullParser, limit: int) -> List[Dict[str, str]]:
+    """Convert up to `limit` <entry> elements completed so far into result dicts, freeing parsed elements"""
+    entries = []
+    if limit <= 0:
+        return entries
+    for _, entry in parser.read_events():
+        link = ""
+        for link_elem in entry.iterfind(f"{ATOM_NS}link"):
+            if link_elem.get("rel", "alternate") == "alternate":
+                link = link_elem.get("href", "")
+                break
+        entries.append({
+            "title": (entry.findtext(f"{ATOM_NS}title") or "").strip(),
+            "summary": (entry.findtext(f"{ATOM_NS}summary") or "").strip(),
+            "link": link,
+            "published": entry.findtext(f"{ATOM_NS}published") or ""
+        })
+        # Keep memory flat: drop this entry and any already-processed siblings
+        entry.clear()
+        while entry.getprevious() is not None:
+            del entry.getparent()[0]
+        if len(entries) >= limit:
+            break
+    return entries
+
 # --- Synchronous Wikipedia Fetch (Public API) ---
 def fetch_wikipedia(query: str) -> str:
+    cached = _wikipedia_cache.get(query)
+    if cached is not None:
+        return cached
     try:
-        url = f"https://en.wikipedia.org/api/rest_v1/page/summary/{query.replace(' ', '_')}"
-        response = requests.get(url, timeout=10)
+        url = _wikipedia_summary_url(query)
+        validator_key = ("wikipedia", query)
+        response = _http.get(url, headers=_conditional_headers(validator_key), timeout=10)
+        if response.status_code == 304:
+            summary = _revalidated_body(validator_key)
+            if summary is not None:
+                _wikipedia_cache.set(query, summary)
+                return summary
+            # The stored body was evicted after the request went out; refetch unconditionally
+            _validators.pop(validator_key)
+            return fetch_wikipedia(query)
         response.raise_for_status()
-        data = response.json()
-        return data.get("extract", "No summary available.")
+        data = orjson.loads(response.content)
+        summary = data.get("extract", "No summary available.")
+        _wikipedia_cache.set(query, summary)
+        _remember_validators(validator_key, summary, response.headers)
+        return summary
     except Exception as e:
         logger.error(f"Wikipedia fetch error: {e}")
-        return f"Failed to retrieve Wikipedia data: {str(e)}"
+        message = f"Failed to retrieve Wikipedia data: {str(e)}"
+        _wikipedia_cache.set(query, message, ttl=NEGATIVE_CACHE_TTL)
+        return message
 
-# --- Synchronous arXiv Fetch (RSS Feed Parse) ---
+# --- Synchronous arXiv Fetch (Atom Feed Parse) ---
 def fetch_arxiv(query: str, max_results: int = 5) -> list:
+    cached = _arxiv_cache.get((query, max_results))
+    if cached is not None:
+        return list(cached)
     try:
-        base_url = "http://export.arxiv.org/api/query"
-        search_query = f"search_query=all:{'+'.join(query.split())}&start=0&max_results={max_results}"
-        response = feedparser.parse(f"{base_url}?{search_query}")
-
+        validator_key = ("arxiv", query, max_results)
+        headers = _conditional_headers(validator_key)
+        parser = _new_arxiv_parser()
         results = []
-        for entry in response.entries:
-            results.append({
-                "title": entry.title,
-                "summary": entry.summary,
-                "link": entry.link,
-                "published": entry.published
-            })
+        with _http.get(_arxiv_query_url(query, max_results), headers=headers, timeout=10, stream=True) as http_response:
+            if http_response.status_code == 304:
+                revalidated = _revalidated_body(validator_key)
+                if revalidated is not None:
+                    _arxiv_cache.set((query, max_results), revalidated)
+                    return list(revalidated)
+                _validators.pop(validator_key)
+                return fetch_arxiv(query, max_results)
+            http_response.raise_for_status()
+            for chunk in http_response.iter_content(FEED_CHUNK_SIZE):
+                parser.feed(chunk)
+                results.extend(_drain_arxiv_entries(parser, max_results - len(results)))
+                if len(results) >= max_results:
+                    break
+            _remember_validators(validator_key, list(results), http_response.headers)
 
+        _arxiv_cache.set((query, max_results), list(results))
         return results
     except Exception as e:
         logger.error(f"arXiv fetch error: {e}")
-        return [{"title": "Error fetching arXiv", "summary": str(e), "link": "", "published": ""}]
+        error_results = [{"title": "Error fetching arXiv", "summary": str(e), "link": "", "published": ""}]
+        _arxiv_cache.set((query, max_results), error_results, ttl=NEGATIVE_CACHE_TTL)
+        return list(error_results)
 
 # --- Async Wikipedia Fetch ---
-async def fetch_wikipedia_async(query: str, session: aiohttp.ClientSession) -> str:
+async def _fetch_wikipedia_once(query: str, session: aiohttp.ClientSession) -> str:
+    url = _wikipedia_summary_url(query)
+    validator_key = ("wikipedia", query)
+    async with session.get(url, headers=_conditional_headers(validator_key), timeout=REQUEST_TIMEOUT) as response:
+        if response.status == 304:
+            summary = _revalidated_body(validator_key)
+            if summary is not None:
+                _wikipedia_cache.set(query, summary)
+                return summary
+            _validators.pop(validator_key)
+            return await _fetch_wikipedia_once(query, session)
+        if response.status == 200:
+            data = await response.json(loads=orjson.loads)
+            summary = data.get("extract", "No summary available.")
+            _wikipedia_cache.set(query, summary)
+            _remember_validators(validator_key, summary, response.headers)
+            return summary
+        if _is_retryable_status(response.status):
+            response.raise_for_status()
+        message = f"Wikipedia API returned status {response.status}"
+        _wikipedia_cache.set(query, message, ttl=NEGATIVE_CACHE_TTL)
+        return message
+
+async def fetch_wikipedia_async(query: str, session: Optional[aiohttp.ClientSession] = None) -> str:
+    cached = _wikipedia_cache.get(query)
+    if cached is not None:
+        return cached
     try:
-        url = f"https://en.wikipedia.org/api/rest_v1/page/summary/{query.replace(' ', '_')}"
-        async with session.get(url, timeout=10) as response:
-            if response.status == 200:
-                data = await response.json()
-                return data.get("extract", "No summary available.")
-            else:
-                return f"Wikipedia API returned status {response.status}"
+        session = session or await get_session()
+        return await _inflight.do(
+            ("wikipedia", query),
+            lambda: _with_retries("en.wikipedia.org", lambda: _fetch_wikipedia_once(query, session)),
+        )
     except Exception as e:
         logger.error(f"Async Wikipedia fetch error: {e}")
-        return f"Failed to retrieve Wikipedia data: {str(e)}"
+        message = f"Failed to retrieve Wikipedia data: {str(e)}"
+        _wikipedia_cache.set(query, message, ttl=NEGATIVE_CACHE_TTL)
+        return message
 
 # --- Async arXiv Fetch ---
-async def fetch_arxiv_async(query: str, max_results: int = 5) -> List[Dict[str, Any]]:
-    try:
-        base_url = "http://export.arxiv.org/api/query"
-        search_query = f"search_query=all:{'+'.join(query.split())}&start=0&max_results={max_results}"
-        
-        # Use requests in a thread pool for feedparser (it's not async)
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(
-            None, 
-            lambda: feedparser.parse(f"{base_url}?{search_query}")
-        )
+async def _fetch_arxiv_once(query: str, max_results: int, session: aiohttp.ClientSession) -> List[Dict[str, Any]]:
+    # Stream the feed over a pooled session, parsing entries as their bytes arrive
+    validator_key = ("arxiv", query, max_results)
+    headers = _conditional_headers(validator_key)
+    parser = _new_arxiv_parser()
+    results = []
+    async with session.get(_arxiv_query_url(query, max_results), headers=headers, timeout=REQUEST_TIMEOUT) as http_response:
+        if http_response.status == 304:
+            revalidated = _revalidated_body(validator_key)
+            if revalidated is not None:
+                _arxiv_cache.set((query, max_results), revalidated)
+                return list(revalidated)
+            _validators.pop(validator_key)
+            return await _fetch_arxiv_once(query, max_results, session)
+        http_response.raise_for_status()
+        async for chunk in http_response.content.iter_chunked(FEED_CHUNK_SIZE):
+            parser.feed(chunk)
+            results.extend(_drain_arxiv_entries(parser, max_results - len(results)))
+            if len(results) >= max_results:
+                break
+        _remember_validators(validator_key, list(results), http_response.headers)
 
-        results = []
-        for entry in response.entries:
-            results.append({
-                "title": entry.title,
-                "summary": entry.summary,
-                "link": entry.link,
-                "published": entry.published
-            })
+    _arxiv_cache.set((query, max_results), list(results))
+    return results
 
-        return results
+async def fetch_arxiv_async(query: str, max_results: int = 5, session: Optional[aiohttp.ClientSession] = None) -> List[Dict[str, Any]]:
+    cached = _arxiv_cache.get((query, max_results))
+    if cached is not None:
+        return list(cached)
+    try:
+        session = session or await get_session()
+        results = await _inflight.do(
+            ("arxiv", query, max_results),
+            lambda: _with_retries("export.arxiv.org", lambda: _fetch_arxiv_once(query, max_results, session)),
+        )
+        # Coalesced callers share one result list; hand each its own copy
+        return list(results)
     except Exception as e:
         logger.error(f"Async arXiv fetch error: {e}")
-        return [{"title": "Error fetching arXiv", "summary": str(e), "link": "", "published": ""}]
+        error_results = [{"title": "Error fetching arXiv", "summary": str(e), "link": "", "published": ""}]
+        _arxiv_cache.set((query, max_results), error_results, ttl=NEGATIVE_CACHE_TTL)
+        return list(error_results)
 
 # --- Async Web Content Fetch ---
-async def fetch_web_content_async(url: str, session: aiohttp.ClientSession) -> str:
-    try:
-        async with session.get(url, timeout=10) as response:
-            if response.status == 200:
-                content = await response.text()
-                soup = BeautifulSoup(content, 'html.parser')
-                
-                # Extract main content (basic extraction)
-                paragraphs = soup.find_all('p')
-                text_content = ' '.join([p.get_text() for p in paragraphs[:5]])
-                
-                return text_content[:500] + "..." if len(text_content) > 500 else text_content
+# Only the first few paragraphs are kept, so never buffer more than this much of a page.
+MAX_HTML_BYTES = 256 * 1024
+MAX_PARAGRAPHS = 5
+# Pages declaring a larger body than this are not worth downloading at all.
+MAX_CONTENT_LENGTH = 2 * 1024 * 1024
+
+def _paragraph_text(elem: etree._Element) -> str:
+    return "".join(elem.itertext())
+
+async def _fetch_web_content_once(url: str, session: aiohttp.ClientSession) -> str:
+    async with session.get(url, timeout=REQUEST_TIMEOUT) as response:
+        if response.status == 200:
+            # Cheap header checks first: skip images, PDFs, JSON and oversized pages
+            content_type = response.headers.get("Content-Type", "")
+            if "html" not in content_type:
+                return f"Skipped non-HTML content: {content_type or 'unknown'}"
+            if response.content_length and response.content_length > MAX_CONTENT_LENGTH:
+                return f"Skipped oversized page: {response.content_length} bytes"
+
+            # Extract main content (basic extraction): parse the page as it streams in
+            # and stop at the first 5 paragraphs or the byte budget, whichever comes first
+            parser = etree.HTMLPullParser(events=("end",), tag="p", encoding=response.charset)
+            paragraphs = []
+            received = 0
+            async for chunk in response.content.iter_chunked(FEED_CHUNK_SIZE):
+                parser.feed(chunk)
+                received += len(chunk)
+                for _, p in parser.read_events():
+                    paragraphs.append(_paragraph_text(p))
+                    if len(paragraphs) >= MAX_PARAGRAPHS:
+                        break
+                if len(paragraphs) >= MAX_PARAGRAPHS or received >= MAX_HTML_BYTES:
+                    break
             else:
-                return f"Failed to fetch content: HTTP {response.status}"
+                # Whole page consumed under budget: flush paragraphs left open at EOF
+                parser.close()
+                for _, p in parser.read_events():
+                    if len(paragraphs) >= MAX_PARAGRAPHS:
+                        break
+                    paragraphs.append(_paragraph_text(p))
+            text_content = ' '.join(paragraphs)
+            
+            return text_content[:500] + "..." if len(text_content) > 500 else text_content
+        if _is_retryable_status(response.status):
+            response.raise_for_status()
+        return f"Failed to fetch content: HTTP {response.status}"
+
+async def fetch_web_content_async(url: str, session: Optional[aiohttp.ClientSession] = None) -> str:
+    try:
+        session = session or await get_session()
+        return await _with_retries(urlsplit(url).hostname or url, lambda: _fetch_web_content_once(url, session))
     except Exception as e:
         logger.error(f"Web content fetch error: {e}")
         return f"Failed to fetch web content: {str(e)}"
 
+# --- Batched Fetches (many queries, bounded concurrency) ---
+# Wikipedia asks API clients to keep parallelism modest, so cap in-flight requests per host.
+MAX_CONCURRENT_PER_HOST = 8
+
+async def fetch_wikipedia_many(queries: List[str], session: Optional[aiohttp.ClientSession] = None) -> List[str]:
+    """Fetch Wikipedia summaries for many queries concurrently, preserving input order"""
+    sem = asyncio.Semaphore(MAX_CONCURRENT_PER_HOST)
+
+    async def one(query: str) -> str:
+        async with sem:
+            return await fetch_wikipedia_async(query, session)
+
+    return await asyncio.gather(*(one(q) for q in queries))
+
+async def fetch_arxiv_many(queries: List[str], max_results: int = 5, session: Optional[aiohttp.ClientSession] = None) -> List[List[Dict[str, Any]]]:
+    """Fetch arXiv papers for many queries concurrently, preserving input order"""
+    sem = asyncio.Semaphore(MAX_CONCURRENT_PER_HOST)
+
+    async def one(query: str) -> List[Dict[str, Any]]:
+        async with sem:
+            return await fetch_arxiv_async(query, max_results, session)
+
+    return await asyncio.gather(*(one(q) for q in queries))
+
 # --- Test function for debugging ---
 async def test_sources():
     """Test function to verify data sources are working"""
-    print("Testing Wikipedia...")
-    wiki_result = fetch_wikipedia("artificial intelligence")
+    print("Testing Wikipedia and arXiv concurrently...")
+    try:
+        wiki_result, arxiv_results = await asyncio.gather(
+            fetch_wikipedia_async("artificial intelligence"),
+            fetch_arxiv_async("machine learning", 2),
+        )
+    finally:
+        await close_session()
+
     print(f"Wikipedia result: {wiki_result[:100]}...")
     
-    print("\nTesting arXiv...")
-    arxiv_results = fetch_arxiv("machine learning", 2)
-    print(f"arXiv results: {len(arxiv_results)} papers found")
+    print(f"\narXiv results: {len(arxiv_results)} papers found")
     for paper in arxiv_results:
         print(f"- {paper.get('title', 'No title')}")
 
@@ -0,0 +1,31 @@
+# backend/http_cache.py
+
+import hashlib
+
+from fastapi import Request
+from fastapi.responses import Response
+
+
+def etag(body: bytes) -> str:
+    """Strong ETag for a pre-serialized body"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str, tag: str) -> bool:
+    """If-None-Match uses weak comparison: `*`, or any listed tag equal once a W/ prefix
+    (added by proxies that re-encode the body) is ignored"""
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == tag for candidate in if_none_match.split(","))
+
+
+def static_json_response(request: Request, body: bytes, tag: str, max_age: int,
+                         public: bool = True) -> Response:
+    """Serve pre-serialized JSON, answering a matching If-None-Match with an empty 304.
+    Routes behind authentication pass public=False so shared caches do not store the body."""
+    scope = "public" if public else "private"
+    headers = {"ETag": tag, "Cache-Control": f"{scope}, max-age={max_age}"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, tag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
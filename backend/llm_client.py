@@ -0,0 +1,21 @@
+# backend/llm_client.py
+
+import os
+import httpx
+from dotenv import load_dotenv
+from openai import OpenAI
+
+load_dotenv()
+
+# Upper bound on simultaneous OpenAI connections per worker: calls come from the agent pool
+# and from the code generator's own LLM pool
+MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "64"))
+
+# Every agent shares this client, so the whole process reuses one keep-alive connection pool
+# instead of each agent module opening (and handshaking) its own. Bounded timeouts make a
+# stalled completion fail rather than pin an agent thread for the SDK's 10-minute default.
+http_client = httpx.Client(
+    limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS // 2),
+    timeout=httpx.Timeout(120.0, connect=5.0),
+)
+client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=http_client)
@@ -1,24 +1,182 @@
 # backend/main.py
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from anyio import to_thread
+from pydantic import BaseModel, Extra
 import uvicorn
-import yaml
-import traceback
+import os
+import hashlib
+import orjson
+import asyncio
+import aiohttp
 import logging
+import atexit
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from uuid import uuid4
+from concurrent.futures import ThreadPoolExecutor
+from typing import Literal
 from dotenv import load_dotenv
 load_dotenv()
 
+from backend.agent_base import AgentInput, BaseAgent
+from backend.backpressure import Backpressure
+from backend.cache import SingleFlight, TTLCache
+from backend.http_cache import etag, static_json_response
+from backend.database import log_workflow_to_bigquery
 from backend.executor import AgentExecutor
-from backend.research_api import router as research_router
-from fastapi.middleware.cors import CORSMiddleware
+from backend.external_sources import close_session
+from backend.research_api import router as research_router, get_research_service
+from backend.research_service import ResearchService
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging: request paths only enqueue records, a background thread does the stream I/O
+_log_queue = queue.SimpleQueue()
+_log_listener = QueueListener(_log_queue, logging.StreamHandler(), respect_handler_level=True)
+logging.basicConfig(level=logging.INFO, handlers=[QueueHandler(_log_queue)], force=True)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="AI Content Studio API", version="1.0.0")
+HEALTH_PATHS = frozenset({"/livez", "/readyz"})
+
+class _HealthCheckFilter(logging.Filter):
+    """Drop access-log lines for probe traffic, which would otherwise dominate the log"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        args = record.args
+        return not (isinstance(args, tuple) and len(args) > 2 and args[2] in HEALTH_PATHS)
+
+logging.getLogger("uvicorn.access").addFilter(_HealthCheckFilter())
+
+# Agent runs hold a thread for the length of their LLM calls (often tens of seconds). They get
+# their own pool so they cannot starve the loop's default executor, which aiohttp also needs
+# for DNS resolution. Threads rather than processes: the work is I/O-bound and agents keep
+# unpicklable API clients.
+AGENT_WORKERS = int(os.getenv("AGENT_WORKERS", "32"))
+
+# Short blocking calls (sqlite reads, BigQuery inserts, DNS lookups) share the loop's default
+# executor, whose stock size of min(32, cpus + 4) is only a handful of threads on small instances
+IO_WORKERS = int(os.getenv("IO_WORKERS", "64"))
+
+async def run_in_agent_pool(fn, *args):
+    """Run a blocking agent call on the dedicated agent thread pool"""
+    return await asyncio.get_running_loop().run_in_executor(app.state.agent_pool, fn, *args)
+
+def _report_bigquery_failure(future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("❌ BigQuery workflow log failed: %s", future.exception())
+
+def log_workflow_in_background(context: dict, prompt: str) -> None:
+    """Start the BigQuery insert on a worker thread without holding the response for it"""
+    future = asyncio.get_running_loop().run_in_executor(None, log_workflow_to_bigquery, context, prompt)
+    future.add_done_callback(_report_bigquery_failure)
+
+# Workflow and code generation runs; cached and coalesced responses never take a slot
+heavy_work = Backpressure(
+    slots=int(os.getenv("HEAVY_CONCURRENCY", "16")),
+    queue=int(os.getenv("HEAVY_QUEUE", "64")),
+)
+
+async def heavy_slot():
+    """Dependency holding a heavy_work slot for the whole request, including a streamed body"""
+    async with heavy_work.slot():
+        yield
+
+async def iterate_in_agent_pool(iter_fn, *args):
+    """Drive a blocking generator on the agent pool, yielding each item on the loop as soon as
+    it is produced. If the consumer goes away (e.g. the client disconnects), the generator is
+    closed at its next item instead of running the rest of its LLM calls for nobody."""
+    loop = asyncio.get_running_loop()
+    items: asyncio.Queue = asyncio.Queue()
+    finished = object()
+    stop = threading.Event()
+
+    def produce():
+        gen = iter_fn(*args)
+        try:
+            for item in gen:
+                if stop.is_set():
+                    # Runs the generator's cleanup now rather than whenever it is collected
+                    gen.close()
+                    return
+                loop.call_soon_threadsafe(items.put_nowait, item)
+        finally:
+            if not stop.is_set():
+                loop.call_soon_threadsafe(items.put_nowait, finished)
+
+    producer = loop.run_in_executor(app.state.agent_pool, produce)
+    try:
+        while (item := await items.get()) is not finished:
+            yield item
+        await producer
+    finally:
+        stop.set()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Own one pooled HTTP session per worker and share it with request handlers"""
+    app.state.http = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=200, limit_per_host=32, ttl_dns_cache=300),
+    )
+    app.state.research = ResearchService(session=app.state.http)
+    app.state.agent_pool = ThreadPoolExecutor(max_workers=AGENT_WORKERS, thread_name_prefix="agent")
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="io")
+    )
+    # Starlette runs sync dependencies and iterators through anyio's limiter (40 tokens by default)
+    to_thread.current_default_thread_limiter().total_tokens = IO_WORKERS
+    # Import and construct every agent now rather than on the first request that needs it
+    await asyncio.to_thread(executor.warm_up)
+    app.state.ready = True
+    try:
+        yield
+    finally:
+        # Fail readiness first so load balancers stop routing here while we drain
+        app.state.ready = False
+        app.state.agent_pool.shutdown(wait=False, cancel_futures=True)
+        # Agents may own their own sessions and loop threads (e.g. research_data)
+        await asyncio.to_thread(executor.close)
+        # Also release the pooled session used by external_sources
+        await asyncio.gather(app.state.http.close(), close_session())
+
+# orjson serializes the large workflow context dicts several times faster than stdlib json
+app = FastAPI(
+    title="AI Content Studio API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
+
+class ErrorLoggingRoute(APIRoute):
+    """Turns an unexpected exception from any handler into one logged 500 response, so handlers
+    need no blanket try/except. Unlike an app-level Exception handler, which Starlette runs
+    outside all middleware, this keeps CORS headers on the error so the frontend can read it."""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            try:
+                return await handler(request)
+            except (StarletteHTTPException, RequestValidationError):
+                raise
+            except Exception as exc:
+                logger.exception("💥 %s %s failed", request.method, request.url.path)
+                return ORJSONResponse({"success": False, "detail": str(exc)}, status_code=500)
+
+        return route_handler
+
+# Must be set before the routes below are declared
+app.router.route_class = ErrorLoggingRoute
 
 # Enable CORS
 app.add_middleware(
@@ -29,264 +187,398 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class StreamAwareGZipMiddleware(GZipMiddleware):
+    """GZip that passes streaming endpoints through untouched; the compressor would hold
+    events back until its buffer filled, defeating progress updates"""
+
+    def __init__(self, app, uncompressed_paths=(), **kwargs):
+        super().__init__(app, **kwargs)
+        self.uncompressed_paths = frozenset(uncompressed_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in self.uncompressed_paths:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+# Workflow responses carry the whole context (research, drafts, code); JSON compresses ~10x.
+# Added after CORS so it runs outside it and compresses the final, header-complete response;
+# preflight replies are far below minimum_size and pass through as-is. Level 5 gets nearly
+# all of level 9's ratio on JSON for a fraction of the CPU.
+app.add_middleware(
+    StreamAwareGZipMiddleware,
+    minimum_size=1024,
+    compresslevel=int(os.getenv("GZIP_LEVEL", "5")),
+    uncompressed_paths=("/run_workflow/stream", "/generate_code/stream"),
+)
+
 # Include research API routes
 app.include_router(research_router)
 
 # Load AgentExecutor with correct task file
 executor = AgentExecutor("backend/task.yaml")
 
-class WorkflowRequest(BaseModel):
+CODE_AGENT_ID = "code_generator_agent"
+
+async def get_code_agent() -> BaseAgent:
+    """The executor's shared CodeGeneratorAgent, also used by /run/code_generator_agent.
+    async so FastAPI resolves it inline; warm_up has already built the agent."""
+    return executor.get_agent(CODE_AGENT_ID)
+
+# Successful LLM-backed responses are replayed for identical requests; prompts are compared
+# with whitespace collapsed so resubmitting the same text with different spacing still hits
+RESPONSE_CACHE_TTL = 15 * 60
+_response_cache = TTLCache(maxsize=256, ttl=RESPONSE_CACHE_TTL)
+
+# Identical requests arriving while one is still running wait for it instead of re-running it
+_inflight = SingleFlight()
+
+def _request_key(kind: str, prompt: str, *params) -> str:
+    """Digest of a request: its prompt with whitespace collapsed plus the other parameters"""
+    material = orjson.dumps([kind, " ".join(prompt.split()), *params])
+    return hashlib.blake2b(material, digest_size=16).hexdigest()
+
+class RequestModel(BaseModel):
+    """Base for request bodies: unknown keys are dropped without being copied and instances
+    are immutable"""
+
+    class Config:
+        extra = Extra.ignore
+        frozen = True
+        max_anystr_length = 100_000
+
+class WorkflowRequest(RequestModel):
     text: str
     workflow_type: str = "content_generation"
 
-class AgentRequest(BaseModel):
+class AgentRequest(RequestModel):
     text: str
 
-class CodeRequest(BaseModel):
+class CodeRequest(RequestModel):
     description: str
     language: str = "python"
     framework: str = ""
-    complexity: str = "medium"
+    # The levels CodeGeneratorAgent plans for; validated by a set lookup, not free-form text
+    complexity: Literal["simple", "medium", "complex"] = "medium"
     include_tests: bool = True
 
+@lru_cache(maxsize=256)
+def _code_agent_input(request: CodeRequest) -> AgentInput:
+    """Agent input for a code request. Frozen requests hash by value, so repeated payloads
+    share one read-only AgentInput instead of building a new dict each time"""
+    return AgentInput({
+        "description": request.description,
+        "language": request.language,
+        "framework": request.framework,
+        "complexity": request.complexity,
+        "include_tests": request.include_tests
+    })
+
 @app.post("/run_workflow")
-def run_workflow(request: WorkflowRequest):
+async def run_workflow(request: WorkflowRequest):
     """Execute the complete multi-agent workflow with real research data"""
+    # The context is plain JSON data, so responses go straight to orjson without the
+    # jsonable_encoder pass FastAPI applies to returned dicts
+    return ORJSONResponse(await _workflow_response(request))
 
-    from backend.database import log_workflow_to_bigquery
+async def _workflow_response(request: WorkflowRequest) -> dict:
+    """The /run_workflow response body: cached, joined from an identical run in flight, or computed"""
+    cache_key = _request_key("workflow", request.text, request.workflow_type)
+    cached = _response_cache.get(cache_key)
+    if cached is not None:
+        logger.info("♻️ Workflow served from response cache")
+        return cached
 
-    try:
-        print(f"🚀 Starting workflow with input: {request.text[:100]}...")
-        result = executor.run_workflow(request.text)
-        
-        if result.success:
-            print("✅ Workflow completed successfully")
-            
-            log_workflow_to_bigquery(result.context, request.text)
-            
-            if 'research_summary' in result.context:
-                print(f"📊 Research completed: {len(result.context.get('research_data', {}).get('results', []))} sources found")
-            
-            return {
-                "success": True,
-                "data": result.context,
-                "stages_completed": result.stages_completed,
-                "workflow_type": request.workflow_type
-            }
-        else:
-            print(f"❌ Workflow failed: {result.error}")
-            return {
-                "success": False,
-                "error": result.error,
-                "data": result.context,
-                "stages_completed": result.stages_completed
-            }
-            
-    except Exception as e:
-        error_msg = f"Workflow execution error: {str(e)}"
-        print(f"💥 {error_msg}")
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=error_msg)
+    async def admitted():
+        async with heavy_work.slot():
+            return await _execute_workflow(request, cache_key)
 
-@app.post("/generate_code")
-def generate_code(request: CodeRequest):
-    """Generate code using AI Code Generator"""
-    try:
-        print(f"💻 Starting code generation: {request.description[:100]}...")
-        
-        from backend.code_generator.agent import CodeGeneratorAgent
-        from backend.agent_base import AgentInput
-        
-        agent = CodeGeneratorAgent()
-        input_data = AgentInput({
-            "description": request.description,
-            "language": request.language,
-            "framework": request.framework,
-            "complexity": request.complexity,
-            "include_tests": request.include_tests
-        })
-        
-        result = agent.run(input_data)
+    return await _inflight.do(cache_key, admitted)
+
+async def _execute_workflow(request: WorkflowRequest, cache_key: str) -> dict:
+    logger.debug("🚀 Starting workflow with input: %.100s...", request.text)
+    # Agents block on LLM and HTTP calls; keep them off the event loop
+    result = await run_in_agent_pool(executor.run_workflow, request.text)
+    
+    if result.success:
+        logger.info("✅ Workflow completed successfully")
         
-        print(f"📊 Code generation result: {result.data.get('status')}")
+        log_workflow_in_background(result.context, request.text)
         
-        if result.data.get("status") == "completed":
-            print("✅ Code generation completed successfully")
-            return {
-                "success": True,
-                "generated_code": result.data.get("generated_code", {}),
-                "test_files": result.data.get("test_files", {}),
-                "documentation": result.data.get("documentation", ""),
-                "setup_instructions": result.data.get("setup_instructions", ""),
-                "api_docs": result.data.get("api_docs", ""),
-                "architecture": result.data.get("architecture", {}),
-                "language": result.data.get("language"),
-                "framework": result.data.get("framework"),
-                "status": "completed"
-            }
-        elif result.data.get("status") == "error":
-            print(f"❌ Code generation failed: {result.data.get('error')}")
-            return {
-                "success": False,
-                "error": result.data.get("error"),
-                "status": "error"
-            }
-        else:
-            return {
-                "success": False,
-                "error": "Code generation status unknown",
-                "status": result.data.get("status", "unknown")
-            }
-            
-    except Exception as e:
-        error_msg = f"Code generation error: {str(e)}"
-        print(f"💥 {error_msg}")
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=error_msg)
-
-@app.get("/code/templates")
-def get_code_templates():
-    """Get available code templates"""
-    try:
-        templates = [
-            {
-                "id": "rest_api",
-                "name": "REST API",
-                "description": "Basic CRUD API with authentication",
-                "language": "python",
-                "framework": "fastapi",
-                "complexity": "medium"
-            },
-            {
-                "id": "react_component",
-                "name": "React Component",
-                "description": "Reusable UI component with props and state",
-                "language": "typescript",
-                "framework": "react",
-                "complexity": "simple"
-            },
-            {
-                "id": "microservice",
-                "name": "Microservice",
-                "description": "Containerized microservice with health checks",
-                "language": "go",
-                "framework": "gin",
-                "complexity": "complex"
-            },
-            {
-                "id": "cli_tool",
-                "name": "CLI Tool",
-                "description": "Command-line utility with argument parsing",
-                "language": "rust",
-                "framework": "",
-                "complexity": "medium"
-            }
-        ]
+        if 'research_summary' in result.context:
+            logger.info("📊 Research completed: %d sources found", len(result.context.get('research_data', {}).get('results', [])))
         
-        return {
+        response = {
             "success": True,
-            "templates": templates,
-            "count": len(templates)
+            "data": result.context,
+            "stages_completed": result.stages_completed,
+            "workflow_type": request.workflow_type
         }
-    except Exception as e:
-        print(f"❌ Error getting code templates: {e}")
+        _response_cache.set(cache_key, response)
+        return response
+    else:
+        logger.warning("❌ Workflow failed: %s", result.error)
         return {
             "success": False,
-            "error": str(e),
-            "templates": []
+            "error": result.error,
+            "data": result.context,
+            "stages_completed": result.stages_completed
         }
 
-@app.get("/code/history")
-def get_code_history():
-    """Get code generation history"""
-    try:
-        history = [
-            {
-                "id": "1",
-                "description": "Task Management API",
-                "language": "python",
-                "framework": "fastapi",
-                "created_at": "2024-01-15T10:30:00Z",
-                "files_count": 8
-            },
-            {
-                "id": "2",
-                "description": "React Dashboard Component",
-                "language": "typescript",
-                "framework": "react",
-                "created_at": "2024-01-14T15:45:00Z",
-                "files_count": 5
-            }
-        ]
-        
-        return {
+@app.post("/run_workflow/stream", dependencies=[Depends(heavy_slot)])
+async def run_workflow_stream(request: WorkflowRequest):
+    """Execute the workflow, sending each completed stage as a Server-Sent Event"""
+    async def stream():
+        async for event in iterate_in_agent_pool(executor.iter_workflow, request.text):
+            result = event.pop("result", None)
+            if result is not None:
+                event.update(result.to_json())
+            yield b"event: " + event["event"].encode() + b"\ndata: " + orjson.dumps(event) + b"\n\n"
+            if result is not None and result.success:
+                log_workflow_in_background(result.context, request.text)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.post("/generate_code")
+async def generate_code(request: CodeRequest, agent: BaseAgent = Depends(get_code_agent)):
+    """Generate code using AI Code Generator"""
+    # Generated files and docs are plain strings/dicts; hand them straight to orjson, as /run_workflow does
+    return ORJSONResponse(await _code_response(request, agent))
+
+async def _code_response(request: CodeRequest, agent: BaseAgent) -> dict:
+    """The /generate_code response body: cached, joined from an identical run in flight, or computed"""
+    cache_key = _request_key(
+        "code", request.description, request.language,
+        request.framework, request.complexity, request.include_tests,
+    )
+    cached = _response_cache.get(cache_key)
+    if cached is not None:
+        logger.info("♻️ Code generation served from response cache")
+        return cached
+
+    async def admitted():
+        async with heavy_work.slot():
+            return await _execute_code_generation(request, agent, cache_key)
+
+    return await _inflight.do(cache_key, admitted)
+
+async def _execute_code_generation(request: CodeRequest, agent: BaseAgent, cache_key: str) -> dict:
+    logger.debug("💻 Starting code generation: %.100s...", request.description)
+    
+    input_data = _code_agent_input(request)
+    
+    result = await agent.arun(input_data, app.state.agent_pool)
+    
+    logger.debug("📊 Code generation result: %s", result.data.get('status'))
+    
+    if result.data.get("status") == "completed":
+        logger.info("✅ Code generation completed successfully")
+        response = {
             "success": True,
-            "history": history,
-            "count": len(history)
+            "generated_code": result.data.get("generated_code", {}),
+            "test_files": result.data.get("test_files", {}),
+            "documentation": result.data.get("documentation", ""),
+            "setup_instructions": result.data.get("setup_instructions", ""),
+            "api_docs": result.data.get("api_docs", ""),
+            "architecture": result.data.get("architecture", {}),
+            "language": result.data.get("language"),
+            "framework": result.data.get("framework"),
+            "status": "completed"
         }
-    except Exception as e:
-        print(f"❌ Error getting code history: {e}")
+        _response_cache.set(cache_key, response)
+        return response
+    elif result.data.get("status") == "error":
+        logger.warning("❌ Code generation failed: %s", result.data.get('error'))
         return {
             "success": False,
-            "error": str(e),
-            "history": []
+            "error": result.data.get("error"),
+            "status": "error"
         }
+    else:
+        return {
+            "success": False,
+            "error": "Code generation status unknown",
+            "status": result.data.get("status", "unknown")
+        }
+
+@app.post("/generate_code/stream", dependencies=[Depends(heavy_slot)])
+async def generate_code_stream(request: CodeRequest, agent: BaseAgent = Depends(get_code_agent)):
+    """Generate code, streaming each file and document as an NDJSON line as soon as it is ready"""
+    input_data = _code_agent_input(request)
+
+    async def stream():
+        async for event in iterate_in_agent_pool(agent.iter_run, input_data):
+            yield orjson.dumps(event) + b"\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson", headers={"Cache-Control": "no-cache"})
+
+# Background tasks: the POST returns 202 with a task id as soon as the work is scheduled and
+# clients poll GET /tasks/{task_id}. State is held in this worker's memory, so with several
+# workers the poll must reach the worker that accepted the task (sticky sessions or one worker).
+TASK_TTL = 60 * 60
+_tasks = TTLCache(maxsize=1024, ttl=TASK_TTL)
+_background_tasks = set()  # the loop keeps only weak references to tasks
+
+def _submit_task(kind: str, work) -> dict:
+    """Schedule `work` (a coroutine function returning a response body) and return its task record"""
+    # Refuse with 503 + Retry-After now rather than accept a task that could only fail later
+    heavy_work.reserve()
+    task_id = uuid4().hex
+    _tasks.set(task_id, {"task_id": task_id, "kind": kind, "status": "running"})
+
+    async def runner():
+        # work() takes its heavy_work slot before its first suspension, so handing the
+        # reservation back here leaves no gap for another request to claim the place
+        heavy_work.release_reservation()
+        try:
+            result = await work()
+        except asyncio.CancelledError:
+            # Cancelled at shutdown: settle the record so pollers are not left waiting on "running"
+            _tasks.set(task_id, {"task_id": task_id, "kind": kind, "status": "failed", "error": "Task was cancelled"})
+            raise
+        except HTTPException as e:
+            record = {"status": "failed", "error": e.detail}
+        except Exception as e:
+            logger.exception("💥 Background %s task %s failed", kind, task_id)
+            record = {"status": "failed", "error": str(e)}
+        else:
+            record = {"status": "completed", "result": result}
+        _tasks.set(task_id, {"task_id": task_id, "kind": kind, **record})
+
+    task = asyncio.create_task(runner())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return {"task_id": task_id, "status": "running", "status_url": f"/tasks/{task_id}"}
+
+@app.post("/run_workflow/async", status_code=202)
+async def run_workflow_async(request: WorkflowRequest):
+    """Start the workflow in the background and return a task id to poll"""
+    return _submit_task("workflow", lambda: _workflow_response(request))
+
+@app.post("/generate_code/async", status_code=202)
+async def generate_code_async(request: CodeRequest, agent: BaseAgent = Depends(get_code_agent)):
+    """Start code generation in the background and return a task id to poll"""
+    return _submit_task("code", lambda: _code_response(request, agent))
+
+@app.get("/tasks/{task_id}")
+async def get_task(task_id: str):
+    """Status of a background task; completed tasks carry the same body the blocking endpoint returns"""
+    record = _tasks.get(task_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired task")
+    return ORJSONResponse(record)
+
+# Static catalogue data: serialized and fingerprinted once at import, served as raw bytes
+CODE_TEMPLATES = (
+    {
+        "id": "rest_api",
+        "name": "REST API",
+        "description": "Basic CRUD API with authentication",
+        "language": "python",
+        "framework": "fastapi",
+        "complexity": "medium"
+    },
+    {
+        "id": "react_component",
+        "name": "React Component",
+        "description": "Reusable UI component with props and state",
+        "language": "typescript",
+        "framework": "react",
+        "complexity": "simple"
+    },
+    {
+        "id": "microservice",
+        "name": "Microservice",
+        "description": "Containerized microservice with health checks",
+        "language": "go",
+        "framework": "gin",
+        "complexity": "complex"
+    },
+    {
+        "id": "cli_tool",
+        "name": "CLI Tool",
+        "description": "Command-line utility with argument parsing",
+        "language": "rust",
+        "framework": "",
+        "complexity": "medium"
+    }
+)
+
+CODE_HISTORY = (
+    {
+        "id": "1",
+        "description": "Task Management API",
+        "language": "python",
+        "framework": "fastapi",
+        "created_at": "2024-01-15T10:30:00Z",
+        "files_count": 8
+    },
+    {
+        "id": "2",
+        "description": "React Dashboard Component",
+        "language": "typescript",
+        "framework": "react",
+        "created_at": "2024-01-14T15:45:00Z",
+        "files_count": 5
+    }
+)
+
+_CODE_TEMPLATES_BODY = orjson.dumps({"success": True, "templates": CODE_TEMPLATES, "count": len(CODE_TEMPLATES)})
+_CODE_TEMPLATES_ETAG = etag(_CODE_TEMPLATES_BODY)
+_CODE_HISTORY_BODY = orjson.dumps({"success": True, "history": CODE_HISTORY, "count": len(CODE_HISTORY)})
+_CODE_HISTORY_ETAG = etag(_CODE_HISTORY_BODY)
+
+@app.get("/code/templates")
+async def get_code_templates(request: Request):
+    """Get available code templates"""
+    return static_json_response(request, _CODE_TEMPLATES_BODY, _CODE_TEMPLATES_ETAG, max_age=3600)
+
+@app.get("/code/history")
+async def get_code_history(request: Request):
+    """Get code generation history"""
+    return static_json_response(request, _CODE_HISTORY_BODY, _CODE_HISTORY_ETAG, max_age=60)
 
 @app.post("/run/{agent_id}")
-def run_agent(agent_id: str, request: AgentRequest):
+async def run_agent(agent_id: str, request: AgentRequest):
     """Run a single agent"""
-    try:
-        from backend.agent_base import AgentInput
-        input_data = AgentInput.from_text(request.text)
-        result = executor.run_agent(agent_id, input_data)
-        return result.to_json()
-    except Exception as e:
-        print(f"\n❌ ERROR while running agent '{agent_id}':", e)
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
+    input_data = AgentInput.from_text(request.text)
+    result = await run_in_agent_pool(executor.run_agent, agent_id, input_data)
+    return result.to_json()
+
+# Like the agent listing below, the workflow configuration is fixed once task.yaml is loaded
+_WORKFLOW_INFO_BODY = orjson.dumps(executor.get_workflow_info())
+_WORKFLOW_INFO_ETAG = etag(_WORKFLOW_INFO_BODY)
 
 @app.get("/workflow/info")
-def get_workflow_info():
+async def get_workflow_info(request: Request):
     """Get information about the configured workflow"""
-    try:
-        return executor.get_workflow_info()
-    except Exception as e:
-        print(f"❌ Error getting workflow info: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    return static_json_response(request, _WORKFLOW_INFO_BODY, _WORKFLOW_INFO_ETAG, max_age=300)
+
+# The agent registry is fixed once task.yaml is loaded, so the listing is serialized once
+_AGENTS_BODY = orjson.dumps({"agents": [
+    {
+        "id": agent_id,
+        "spec_path": spec["spec_path"],
+        "input_keys": spec.get("input_keys", []),
+        "output_keys": spec.get("output_keys", [])
+    }
+    for agent_id, spec in executor.agent_specs.items()
+]})
+_AGENTS_ETAG = etag(_AGENTS_BODY)
 
 @app.get("/agents")
-def list_agents():
+async def list_agents(request: Request):
     """List all available agents"""
-    try:
-        agents = []
-        for agent_id, spec in executor.agent_specs.items():
-            agents.append({
-                "id": agent_id,
-                "spec_path": spec["spec_path"],
-                "input_keys": spec.get("input_keys", []),
-                "output_keys": spec.get("output_keys", [])
-            })
-        return {"agents": agents}
-    except Exception as e:
-        print(f"❌ Error listing agents: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    return static_json_response(request, _AGENTS_BODY, _AGENTS_ETAG, max_age=300)
 
 @app.get("/test/research")
-def test_research_endpoint():
+async def test_research_endpoint(service: ResearchService = Depends(get_research_service)):
     """Test endpoint to verify research functionality"""
     try:
-        from backend.research_service import ResearchService
-        import asyncio
-        
-        async def test_research():
-            async with ResearchService() as service:
-                results = await service.search(
-                    query="artificial intelligence",
-                    filters={'sources': ['academic', 'web'], 'min_relevance': 0.3}
-                )
-                return results
-        
-        results = asyncio.run(test_research())
+        results = await service.search(
+            query="artificial intelligence",
+            filters={'sources': ['academic', 'web'], 'min_relevance': 0.3}
+        )
         
         return {
             "success": True,
@@ -304,12 +596,10 @@ def test_research_endpoint():
         }
 
 @app.get("/test/code")
-def test_code_endpoint():
+async def test_code_endpoint():
     """Test endpoint to verify code generation functionality"""
     try:
-        from backend.code_generator.agent import CodeGeneratorAgent
-        
-        agent = CodeGeneratorAgent()
+        agent = await get_code_agent()
         
         return {
             "success": True,
@@ -325,54 +615,68 @@ def test_code_endpoint():
             "message": "Code generation system test failed"
         }
 
-@app.get("/")
-def read_root():
-    return {
-        "message": "AI Content Studio + Research Agent + Code Generation backend is live!",
-        "version": "1.0.0",
-        "endpoints": {
-            "workflow": "/run_workflow",
-            "single_agent": "/run/{agent_id}",
-            "code_generation": "/generate_code",
-            "code_templates": "/code/templates",
-            "code_history": "/code/history",
-            "workflow_info": "/workflow/info",
-            "agents": "/agents",
-            "research": "/api/research/*",
-            "test_research": "/test/research",
-            "test_code": "/test/code"
-        }
+ROOT_INFO = {
+    "message": "AI Content Studio + Research Agent + Code Generation backend is live!",
+    "version": "1.0.0",
+    "endpoints": {
+        "workflow": "/run_workflow",
+        "workflow_stream": "/run_workflow/stream",
+        "workflow_async": "/run_workflow/async",
+        "single_agent": "/run/{agent_id}",
+        "code_generation": "/generate_code",
+        "code_generation_stream": "/generate_code/stream",
+        "code_generation_async": "/generate_code/async",
+        "task_status": "/tasks/{task_id}",
+        "code_templates": "/code/templates",
+        "code_history": "/code/history",
+        "workflow_info": "/workflow/info",
+        "agents": "/agents",
+        "research": "/api/research/*",
+        "test_research": "/test/research",
+        "test_code": "/test/code",
+        "liveness": "/livez",
+        "readiness": "/readyz"
     }
+}
+_ROOT_BODY = orjson.dumps(ROOT_INFO)
+_ROOT_ETAG = etag(_ROOT_BODY)
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # or just your frontend URL for stricter security
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+@app.get("/")
+async def read_root(request: Request):
+    # Hit by uptime checks and the frontend; the body never changes, so it is serialized once
+    return static_json_response(request, _ROOT_BODY, _ROOT_ETAG, max_age=300)
 
-from backend.research_service import ResearchService
-from fastapi import Request
-from pydantic import BaseModel
+_LIVE_BODY = b'{"ok":true}'
+_NOT_READY_BODY = b'{"ok":false}'
 
-class ResearchQuery(BaseModel):
+@app.get("/livez")
+async def livez():
+    """Liveness probe: the process is serving requests"""
+    return Response(content=_LIVE_BODY, media_type="application/json")
+
+@app.get("/readyz")
+async def readyz(request: Request):
+    """Readiness probe: startup (agent warm-up, shared sessions) has finished and we are not draining"""
+    if getattr(request.app.state, "ready", False):
+        return Response(content=_LIVE_BODY, media_type="application/json")
+    return Response(content=_NOT_READY_BODY, status_code=503, media_type="application/json")
+
+class ResearchQuery(RequestModel):
     query: str
 
 @app.post("/search")
-async def search_api(query: ResearchQuery):
+async def search_api(query: ResearchQuery, service: ResearchService = Depends(get_research_service)):
     try:
-        async with ResearchService() as service:
-            results = await service.search(
-                query=query.query,
-                filters={"sources": ["academic", "web"], "min_relevance": 0.3}
-            )
-            return {
-                "success": True,
-                "results": results.get("results", []),
-                "sources": results.get("sources_searched", []),
-                "total_results": results.get("total_results", 0)
-            }
+        results = await service.search(
+            query=query.query,
+            filters={"sources": ["academic", "web"], "min_relevance": 0.3}
+        )
+        return {
+            "success": True,
+            "results": results.get("results", []),
+            "sources": results.get("sources_searched", []),
+            "total_results": results.get("total_results", 0)
+        }
     except Exception as e:
         return {
             "success": False,
@@ -381,4 +685,26 @@ async def search_api(query: ResearchQuery):
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # uvloop and httptools are not available on Windows; fall back to asyncio and h11 there
+    try:
+        import uvloop  # noqa: F401
+        loop = "uvloop"
+    except ImportError:
+        loop = "asyncio"
+    try:
+        import httptools  # noqa: F401
+        http = "httptools"
+    except ImportError:
+        http = "h11"
+
+    # Multiple workers need an import string; each worker builds its own app and lifespan.
+    # log_config=None keeps the queue-backed logging configured above.
+    uvicorn.run(
+        "backend.main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.getenv("WEB_CONCURRENCY", (os.cpu_count() or 1) * 2 + 1)),
+        loop=loop,
+        http=http,
+        log_config=None,
+    )
\ No newline at end of file
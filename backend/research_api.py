@@ -1,48 +1,88 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Request
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Extra, Field
 from typing import List, Dict, Any, Optional
 import asyncio
 import logging
-from datetime import datetime
+import orjson
+from datetime import datetime, timedelta
 
-from backend.research_service import ResearchService
-from backend.database import ResearchDatabase
+from backend.cache import TTLCache
+from backend.http_cache import etag, static_json_response
+from backend.research_service import DATA_SOURCES, ResearchService
+from backend.database import InvalidCursor, ResearchDatabase
 
 logger = logging.getLogger(__name__)
-router = APIRouter(prefix="/api/research", tags=["research"])
-security = HTTPBearer()
+# Search results and analytics are plain JSON data; orjson encodes them directly
+router = APIRouter(prefix="/api/research", tags=["research"], default_response_class=ORJSONResponse)
+# Missing credentials are rejected in get_current_user rather than by the scheme itself
+security = HTTPBearer(auto_error=False)
+
+# A client sends the same bearer token on every call; verify it once per minute, not per request
+TOKEN_CACHE_TTL = 60
+_token_cache = TTLCache(maxsize=4096, ttl=TOKEN_CACHE_TTL)
 
 # Pydantic models
-class ResearchQuery(BaseModel):
+class ResearchModel(BaseModel):
+    """Base for research API models: unknown keys are dropped and instances are immutable"""
+
+    class Config:
+        extra = Extra.ignore
+        frozen = True
+
+class ResearchQuery(ResearchModel):
     query: str = Field(..., min_length=1, max_length=500, description="Research query text")
     filters: Optional[Dict[str, Any]] = Field(default_factory=dict, description="Search filters")
     user_id: Optional[str] = Field(None, description="User identifier")
 
-class ResearchFilters(BaseModel):
+class ResearchFilters(ResearchModel):
     sources: Optional[List[str]] = Field(None, description="Data sources to search")
     data_types: Optional[List[str]] = Field(None, description="Types of data to include")
     date_from: Optional[str] = Field(None, description="Start date (ISO format)")
     date_to: Optional[str] = Field(None, description="End date (ISO format)")
     min_relevance: Optional[float] = Field(0.0, ge=0.0, le=1.0, description="Minimum relevance score")
 
-class PaginationParams(BaseModel):
+class PaginationParams(ResearchModel):
     page: int = Field(1, ge=1, description="Page number")
     page_size: int = Field(20, ge=1, le=100, description="Items per page")
 
-# Dependency for authentication (simplified)
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+def _verify_token(token: str) -> dict:
     # In a real implementation, validate the JWT token
     # For now, return a mock user
     return {"user_id": "user123", "username": "researcher"}
 
+# Dependency for authentication (simplified)
+async def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)):
+    if credentials is None:
+        raise HTTPException(status_code=403, detail="Not authenticated")
+    user = _token_cache.get(credentials.credentials)
+    if user is None:
+        user = _verify_token(credentials.credentials)
+        _token_cache.set(credentials.credentials, user)
+    return user
+
+async def get_research_service(request: Request) -> ResearchService:
+    """The per-worker ResearchService created in the app lifespan; reuses its pooled aiohttp session.
+    async so FastAPI resolves it inline rather than on the threadpool."""
+    return request.app.state.research
+
 # Initialize services
 research_db = ResearchDatabase()
 
+# Analytics aggregate the whole query log; a minute-old view is fine and saves a DB scan per call
+ANALYTICS_CACHE_TTL = 60
+_analytics_cache = TTLCache(maxsize=8, ttl=ANALYTICS_CACHE_TTL)
+
+# Suggestions come from the same query log; typing sends the same prefixes over and over
+SUGGESTIONS_CACHE_TTL = 60
+_suggestions_cache = TTLCache(maxsize=1024, ttl=SUGGESTIONS_CACHE_TTL)
+
 @router.post("/search")
 async def search_research(
     query: ResearchQuery,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    service: ResearchService = Depends(get_research_service)
 ):
     """
     Perform a comprehensive research search across multiple real data sources.
@@ -56,18 +96,17 @@ async def search_research(
         filters = query.filters or {}
         
         # Perform the search using real data sources
-        async with ResearchService() as service:
-            results = await service.search(
-                query=query.query,
-                filters=filters,
-                user_id=query.user_id or current_user["user_id"]
-            )
+        results = await service.search(
+            query=query.query,
+            filters=filters,
+            user_id=query.user_id or current_user["user_id"]
+        )
         
-        return {
+        return ORJSONResponse({
             "success": True,
             "data": results,
             "message": f"Found {results['total_results']} results for '{query.query}'"
-        }
+        })
         
     except Exception as e:
         logger.error(f"Research search failed: {e}")
@@ -78,6 +117,7 @@ async def get_query_results(
     query_id: int,
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -86,16 +126,21 @@ async def get_query_results(
     - **query_id**: The ID of the research query
     - **page**: Page number (starts from 1)
     - **page_size**: Number of items per page (max 100)
+    - **cursor**: Continue after a previous page; faster than `page` for deep pages and takes precedence
     """
     try:
-        results = research_db.get_query_results(query_id, page, page_size)
+        # sqlite calls block; keep them off the event loop
+        results = await asyncio.to_thread(research_db.get_query_results, query_id, page, page_size, cursor)
         
-        return {
+        position = "the next page" if cursor is not None else f"page {page}"
+        return ORJSONResponse({
             "success": True,
             "data": results,
-            "message": f"Retrieved page {page} of results for query {query_id}"
-        }
+            "message": f"Retrieved {position} of results for query {query_id}"
+        })
         
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     except Exception as e:
         logger.error(f"Failed to get query results: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to retrieve results: {str(e)}")
@@ -103,45 +148,52 @@ async def get_query_results(
 @router.get("/suggestions")
 async def get_search_suggestions(
     q: str = Query(..., min_length=1, description="Partial query for suggestions"),
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    service: ResearchService = Depends(get_research_service)
 ):
     """
     Get search suggestions based on partial query input and previous searches.
     
     - **q**: Partial query text
     """
+    # Matching is case-insensitive, so differently cased prefixes share an entry
+    cache_key = q.strip().lower()
+    cached = _suggestions_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     try:
-        async with ResearchService() as service:
-            suggestions = service.get_search_suggestions(q)
+        suggestions = await asyncio.to_thread(service.get_search_suggestions, q)
         
-        return {
+        response = {
             "success": True,
             "data": {"suggestions": suggestions},
             "message": f"Generated {len(suggestions)} suggestions"
         }
+        _suggestions_cache.set(cache_key, response)
+        return response
         
     except Exception as e:
         logger.error(f"Failed to get suggestions: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get suggestions: {str(e)}")
 
+# The source catalogue is fixed at import, so the listing is serialized once
+_SOURCES_BODY = orjson.dumps({
+    "success": True,
+    "data": {"sources": DATA_SOURCES},
+    "message": f"Retrieved {len(DATA_SOURCES)} data sources"
+})
+_SOURCES_ETAG = etag(_SOURCES_BODY)
+
 @router.get("/sources")
-async def get_data_sources(current_user: dict = Depends(get_current_user)):
+async def get_data_sources(
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
     """
     Get available data sources and their information.
     """
-    try:
-        async with ResearchService() as service:
-            sources = service.get_data_sources()
-        
-        return {
-            "success": True,
-            "data": {"sources": sources},
-            "message": f"Retrieved {len(sources)} data sources"
-        }
-        
-    except Exception as e:
-        logger.error(f"Failed to get data sources: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to get data sources: {str(e)}")
+    return static_json_response(request, _SOURCES_BODY, _SOURCES_ETAG, max_age=900, public=False)
 
 @router.get("/history")
 async def get_search_history(
@@ -154,7 +206,8 @@ async def get_search_history(
     - **limit**: Maximum number of queries to return (max 50)
     """
     try:
-        queries = research_db.get_recent_queries(
+        queries = await asyncio.to_thread(
+            research_db.get_recent_queries,
             user_id=current_user["user_id"],
             limit=limit
         )
@@ -179,9 +232,13 @@ async def get_research_analytics(
     
     - **days**: Number of days to include in analytics (max 365)
     """
+    cached = _analytics_cache.get(days)
+    if cached is not None:
+        return cached
+
     try:
         # Get real analytics from database
-        recent_queries = research_db.get_recent_queries(limit=100)
+        recent_queries = await asyncio.to_thread(research_db.get_recent_queries, limit=100)
         
         # Calculate real statistics
         total_searches = len(recent_queries)
@@ -195,6 +252,7 @@ async def get_research_analytics(
             pass
         
         # Generate analytics based on real data where possible
+        today = datetime.now().date()
         analytics = {
             "total_searches": total_searches,
             "unique_queries": unique_queries,
@@ -206,7 +264,7 @@ async def get_research_analytics(
                 {"source": "World Bank", "count": int(total_searches * 0.1)}
             ],
             "search_trends": [
-                {"date": (datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d"), 
+                {"date": (today - timedelta(days=i)).isoformat(),
                  "searches": max(1, total_searches // 7 + (i % 3))}
                 for i in range(7)
             ],
@@ -216,11 +274,13 @@ async def get_research_analytics(
             ]
         }
         
-        return {
+        response = {
             "success": True,
             "data": analytics,
             "message": f"Retrieved analytics for the last {days} days"
         }
+        _analytics_cache.set(days, response)
+        return response
         
     except Exception as e:
         logger.error(f"Failed to get analytics: {e}")
@@ -2,35 +2,86 @@ import asyncio
 import aiohttp
 import hashlib
 import logging
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime
 from urllib.parse import quote_plus
-import json
+import orjson
 import arxiv
 import wikipedia
 from bs4 import BeautifulSoup
 
+from backend.cache import TTLCache
 from backend.database import ResearchDatabase
 
 logger = logging.getLogger(__name__)
 
+# Search responses are kept in sqlite for six hours; repeat queries are served from memory first
+SEARCH_CACHE_TTL = 6 * 60 * 60
+_search_cache = TTLCache(maxsize=256, ttl=SEARCH_CACHE_TTL)
+
+# Sources searched by ResearchService, grouped by the filter value that selects them
+DATA_SOURCES = [
+    {'name': 'arXiv', 'type': 'academic', 'url': 'https://arxiv.org',
+     'description': 'Preprints in physics, mathematics, computer science and related fields'},
+    {'name': 'PubMed', 'type': 'academic', 'url': 'https://pubmed.ncbi.nlm.nih.gov',
+     'description': 'Biomedical and life sciences literature'},
+    {'name': 'Wikipedia', 'type': 'web', 'url': 'https://www.wikipedia.org',
+     'description': 'Encyclopedia article summaries'},
+    {'name': 'Google News', 'type': 'web', 'url': 'https://news.google.com',
+     'description': 'Recent news coverage from the Google News RSS feed'},
+    {'name': 'World Bank', 'type': 'statistics', 'url': 'https://data.worldbank.org',
+     'description': 'World Bank development indicators'},
+]
+
+@lru_cache(maxsize=256)
+def _query_terms(query: str) -> Tuple[str, Tuple[str, ...]]:
+    """Lower-cased query and its scoring terms; computed once per query, not once per result"""
+    query_lower = query.lower()
+    return query_lower, tuple(term.strip() for term in query_lower.split() if len(term.strip()) > 2)
+
 class ResearchService:
-    def __init__(self):
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None):
         self.db = ResearchDatabase()
         self.rate_limits = {}
-        self.session = None
+        # A caller-supplied session (e.g. the app-wide pool) is borrowed and never closed here
+        self.session = session
+        self._owns_session = False
 
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        if self.session is None:
+            # One instance serves many concurrent searches; bound the keep-alive pool it shares
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=100, limit_per_host=20, ttl_dns_cache=300),
+            )
+            self._owns_session = True
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
+        if self.session and self._owns_session:
             await self.session.close()
+            self.session = None
+            self._owns_session = False
 
     def _generate_cache_key(self, query: str, filters: Dict[str, Any]) -> str:
-        content = f"{query}_{json.dumps(filters, sort_keys=True)}"
-        return hashlib.md5(content.encode()).hexdigest()
+        material = orjson.dumps([query, filters], option=orjson.OPT_SORT_KEYS)
+        return hashlib.blake2b(material, digest_size=16).hexdigest()
+
+    def get_search_suggestions(self, partial: str, limit: int = 10) -> List[str]:
+        """Previous queries containing `partial`, prefix matches first; reads sqlite, so call off the loop"""
+        partial_lower = partial.lower().strip()
+        prefix, contains, seen = [], [], set()
+        for row in self.db.get_recent_queries(limit=200):
+            text = row.get('query_text') or ''
+            text_lower = text.lower()
+            if text_lower in seen or partial_lower not in text_lower:
+                continue
+            seen.add(text_lower)
+            (prefix if text_lower.startswith(partial_lower) else contains).append(text)
+        return (prefix + contains)[:limit]
+
+    def get_data_sources(self) -> List[Dict[str, Any]]:
+        return [dict(source) for source in DATA_SOURCES]
 
     def _check_rate_limit(self, source: str, limit: int = 100) -> bool:
         now = datetime.now()
@@ -44,6 +95,11 @@ class ResearchService:
         return True
 
     async def _search_academic_sources(self, query: str, filters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # arXiv and PubMed are independent; each logs and drops its own failures
+        arxiv_results, pubmed_results = await asyncio.gather(self._search_arxiv(query), self._search_pubmed(query))
+        return arxiv_results + pubmed_results
+
+    async def _search_arxiv(self, query: str) -> List[Dict[str, Any]]:
         results = []
         try:
             search = arxiv.Search(
@@ -51,7 +107,9 @@ class ResearchService:
                 max_results=10,
                 sort_by=arxiv.SortCriterion.Relevance
             )
-            for paper in search.results():
+            # The arxiv client pages through results with blocking HTTP calls
+            papers = await asyncio.to_thread(list, search.results())
+            for paper in papers:
                 results.append({
                     'title': paper.title,
                     'content': paper.summary[:500] + "..." if len(paper.summary) > 500 else paper.summary,
@@ -69,7 +127,10 @@ class ResearchService:
                 })
         except Exception as e:
             logger.error(f"arXiv error: {e}")
-        
+        return results
+
+    async def _search_pubmed(self, query: str) -> List[Dict[str, Any]]:
+        results = []
         try:
             if self.session:
                 pubmed_url = f"https://pubmed.ncbi.nlm.nih.gov/?term={quote_plus(query)}&size=10"
@@ -102,31 +163,46 @@ class ResearchService:
         return results
 
     async def _search_web_sources(self, query: str, filters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # Wikipedia and Google News are independent; each logs and drops its own failures
+        wiki_results, news_results = await asyncio.gather(self._search_wikipedia(query), self._search_news(query))
+        return wiki_results + news_results
+
+    async def _search_wikipedia(self, query: str) -> List[Dict[str, Any]]:
         results = []
         try:
-            search_results = wikipedia.search(query, results=10)
-            for title in search_results[:10]:
-                try:
-                    page = wikipedia.page(title)
-                    summary = wikipedia.summary(title, sentences=3)
-                    results.append({
-                        'title': page.title,
-                        'content': summary,
-                        'source': 'Wikipedia',
-                        'url': page.url,
-                        'relevance_score': self._calculate_relevance_score_text(page.title + " " + summary, query),
-                        'data_type': 'encyclopedia',
-                        'metadata': {
-                            'publication_date': datetime.now().isoformat(),
-                            'page_id': page.pageid,
-                            'categories': getattr(page, 'categories', [])[:5]
-                        }
-                    })
-                except:
-                    continue
+            # The wikipedia client is blocking; search, then fetch every page on its own thread at once
+            search_results = await asyncio.to_thread(wikipedia.search, query, results=10)
+            pages = await asyncio.gather(
+                *(asyncio.to_thread(self._wikipedia_result, title, query) for title in search_results[:10])
+            )
+            results = [page for page in pages if page is not None]
         except Exception as e:
             logger.error(f"Wikipedia error: {e}")
+        return results
+
+    def _wikipedia_result(self, title: str, query: str) -> Optional[Dict[str, Any]]:
+        """One Wikipedia search hit as a result; None if the page cannot be loaded"""
+        try:
+            page = wikipedia.page(title)
+            summary = wikipedia.summary(title, sentences=3)
+            return {
+                'title': page.title,
+                'content': summary,
+                'source': 'Wikipedia',
+                'url': page.url,
+                'relevance_score': self._calculate_relevance_score_text(page.title + " " + summary, query),
+                'data_type': 'encyclopedia',
+                'metadata': {
+                    'publication_date': datetime.now().isoformat(),
+                    'page_id': page.pageid,
+                    'categories': getattr(page, 'categories', [])[:5]
+                }
+            }
+        except:
+            return None
 
+    async def _search_news(self, query: str) -> List[Dict[str, Any]]:
+        results = []
         try:
             if self.session:
                 news_url = f"https://news.google.com/rss/search?q={quote_plus(query)}&hl=en-US&gl=US&ceid=US:en"
@@ -164,7 +240,7 @@ class ResearchService:
                 wb_url = f"https://api.worldbank.org/v2/indicator?format=json&q={quote_plus(query)}"
                 async with self.session.get(wb_url, timeout=10) as response:
                     if response.status == 200:
-                        data = await response.json()
+                        data = await response.json(loads=orjson.loads)
                         if len(data) > 1 and data[1]:
                             indicators = data[1][:10]
                             for indicator in indicators:
@@ -189,22 +265,20 @@ class ResearchService:
         if not text or not query:
             return 0.0
         text_lower = text.lower()
-        query_terms = [term.strip() for term in query.lower().split() if len(term.strip()) > 2]
+        query_lower, query_terms = _query_terms(query)
         if not query_terms:
             return 0.5
         score = 0.0
-        if query.lower() in text_lower:
+        if query_lower in text_lower:
             score += 0.4
-        term_matches = sum(1 for term in query_terms if term in text_lower)
-        term_score = (term_matches / len(query_terms)) * 0.4
+        # One scan per term; the first-occurrence offsets serve both the match count and proximity
+        found = [pos for pos in map(text_lower.find, query_terms) if pos >= 0]
+        term_score = (len(found) / len(query_terms)) * 0.4
         score += term_score
-        for i, term1 in enumerate(query_terms):
-            for term2 in query_terms[i+1:]:
-                if term1 in text_lower and term2 in text_lower:
-                    pos1 = text_lower.find(term1)
-                    pos2 = text_lower.find(term2)
-                    if abs(pos1 - pos2) < 50:
-                        score += 0.1
+        for i, pos1 in enumerate(found):
+            for pos2 in found[i+1:]:
+                if abs(pos1 - pos2) < 50:
+                    score += 0.1
         if len(text) < 100:
             score *= 0.8
         return min(1.0, score)
@@ -213,26 +287,43 @@ class ResearchService:
         if filters is None:
             filters = {}
         cache_key = self._generate_cache_key(query, filters)
-        cached_result = self.db.get_cached_data(cache_key)
+        cached_result = _search_cache.get(cache_key)
+        if cached_result is not None:
+            return cached_result
+        # sqlite calls block; keep them off the event loop
+        cached_result = await asyncio.to_thread(self.db.get_cached_data, cache_key)
         if cached_result:
+            _search_cache.set(cache_key, cached_result)
             return cached_result
-        query_id = self.db.save_query(query, filters, user_id)
         try:
             all_results = []
+            searches = []
             if not filters.get('sources') or 'academic' in filters.get('sources', []):
                 if self._check_rate_limit('academic'):
-                    academic_results = await self._search_academic_sources(query, filters)
-                    all_results.extend(academic_results)
+                    searches.append(('academic', self._search_academic_sources(query, filters)))
             if not filters.get('sources') or 'web' in filters.get('sources', []):
                 if self._check_rate_limit('web'):
-                    web_results = await self._search_web_sources(query, filters)
-                    all_results.extend(web_results)
+                    searches.append(('web', self._search_web_sources(query, filters)))
             if not filters.get('sources') or 'statistics' in filters.get('sources', []):
                 if self._check_rate_limit('statistics'):
-                    stats_results = await self._search_statistical_sources(query, filters)
-                    all_results.extend(stats_results)
+                    searches.append(('statistics', self._search_statistical_sources(query, filters)))
+            # Source groups are independent: wait for the slowest one, not the sum of all,
+            # and let one failing group drop out without failing the whole search. The query
+            # row is only needed once results are saved, so it is recorded meanwhile.
+            query_id, *outcomes = await asyncio.gather(
+                asyncio.to_thread(self.db.save_query, query, filters, user_id),
+                *(coro for _, coro in searches),
+                return_exceptions=True,
+            )
+            if isinstance(query_id, Exception):
+                raise query_id
+            for (source, _), outcome in zip(searches, outcomes):
+                if isinstance(outcome, Exception):
+                    logger.error(f"{source} search failed for {query}: {outcome}")
+                    continue
+                all_results.extend(outcome)
             all_results.sort(key=lambda x: x['relevance_score'], reverse=True)
-            self.db.save_results(query_id, all_results)
+            await asyncio.to_thread(self.db.save_results, query_id, all_results)
             response = {
                 'query_id': query_id,
                 'query': query,
@@ -243,7 +334,8 @@ class ResearchService:
                 'sources_searched': ['academic', 'web', 'statistics'],
                 'cache_key': cache_key
             }
-            self.db.set_cache(cache_key, response, expires_in_hours=6)
+            await asyncio.to_thread(self.db.set_cache, cache_key, response, 6)
+            _search_cache.set(cache_key, response)
             return response
         except Exception as e:
             logger.error(f"Search failed for {query}: {e}")
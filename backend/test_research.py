@@ -1,7 +1,11 @@
 import asyncio
+import sqlite3
 import pytest
+from fastapi import HTTPException
 from backend.research_service import ResearchService
 from backend.database import ResearchDatabase
+from backend.backpressure import Backpressure
+from backend.cache import SingleFlight, TTLCache
 from backend.external_sources import fetch_wikipedia, fetch_arxiv
 
 async def test_research_service():
@@ -62,6 +66,149 @@ def test_database():
     results = db.get_query_results(query_id)
     print(f"Retrieved {len(results['results'])} results")
 
+def test_query_results_cursor(tmp_path):
+    """Test that following next_cursor walks the same rows as page numbers"""
+    db = ResearchDatabase(str(tmp_path / "research.db"))
+    query_id = db.save_query("cursor query")
+    db.save_results(query_id, [
+        {'title': f'Result {i}', 'relevance_score': (i % 3) / 2}
+        for i in range(7)
+    ] + [{'title': 'Unscored', 'relevance_score': None}])
+
+    by_page = [r['title'] for page in (1, 2, 3) for r in db.get_query_results(query_id, page, 3)['results']]
+
+    by_cursor = []
+    data = db.get_query_results(query_id, page_size=3)
+    by_cursor += [r['title'] for r in data['results']]
+    while data['next_cursor']:
+        data = db.get_query_results(query_id, page_size=3, after=data['next_cursor'])
+        by_cursor += [r['title'] for r in data['results']]
+
+    assert by_cursor == by_page
+    assert len(by_page) == 8
+    assert by_page[-1] == 'Unscored'
+
+def test_query_results_legacy_null_score(tmp_path):
+    """Test that a result stored with a NULL score is still counted and returned"""
+    db_path = str(tmp_path / "research.db")
+    db = ResearchDatabase(db_path)
+    query_id = db.save_query("legacy query")
+    db.save_results(query_id, [{'title': 'Scored', 'relevance_score': 0.5}])
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "INSERT INTO research_results (query_id, title, relevance_score) VALUES (?, ?, NULL)",
+            (query_id, 'Legacy')
+        )
+
+    db = ResearchDatabase(db_path)
+    data = db.get_query_results(query_id, page_size=1)
+    assert data['total_count'] == 2
+    assert [r['title'] for r in data['results']] == ['Scored']
+
+    data = db.get_query_results(query_id, page_size=1, after=data['next_cursor'])
+    assert [r['title'] for r in data['results']] == ['Legacy']
+    assert data['results'][0]['relevance_score'] == 0
+
+def test_ttl_cache():
+    """Test in-process TTL cache expiry and LRU eviction"""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    # "b" is now least recently used and is evicted first
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+    # Per-entry TTL overrides the default
+    cache.set("d", 4, ttl=0)
+    assert cache.get("d", "expired") == "expired"
+
+def test_single_flight():
+    """Test that concurrent identical calls share one execution"""
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def run_concurrently():
+        return await asyncio.gather(*(flight.do("query", fetch) for _ in range(5)))
+
+    assert asyncio.run(run_concurrently()) == ["result"] * 5
+    assert len(calls) == 1
+    assert len(flight) == 0
+
+def test_single_flight_leader_cancelled():
+    """Test that followers take over when the caller running the work is cancelled"""
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def run():
+        leader = asyncio.create_task(flight.do("query", fetch))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(flight.do("query", fetch)) for _ in range(3)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        results = await asyncio.gather(*followers)
+        assert leader.cancelled()
+        return results
+
+    assert asyncio.run(run()) == ["result"] * 3
+    # One run for the cancelled leader, one for the follower that took over
+    assert len(calls) == 2
+    assert len(flight) == 0
+
+def test_backpressure():
+    """Test that admissions beyond slots + queue are refused with 503 and Retry-After"""
+    gate = Backpressure(slots=1, queue=1, retry_after=7)
+
+    async def hold(release):
+        async with gate.slot():
+            await release.wait()
+
+    async def run():
+        release = asyncio.Event()
+        # One request runs, the second waits for the slot
+        holders = [asyncio.create_task(hold(release)) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert gate.admitted == 2
+
+        with pytest.raises(HTTPException) as excinfo:
+            async with gate.slot():
+                pass
+        assert excinfo.value.status_code == 503
+        assert excinfo.value.headers["Retry-After"] == "7"
+
+        # A cancelled waiter gives its place back
+        holders[1].cancel()
+        await asyncio.gather(holders[1], return_exceptions=True)
+        assert gate.admitted == 1
+
+        release.set()
+        await holders[0]
+        assert gate.admitted == 0
+
+        # Reservations count against capacity until they are handed back
+        gate.reserve()
+        gate.reserve()
+        with pytest.raises(HTTPException):
+            gate.reserve()
+        gate.release_reservation()
+        gate.release_reservation()
+        async with gate.slot():
+            assert gate.admitted == 1
+
+    asyncio.run(run())
+
 def test_external_sources():
     """Test external data sources directly"""
     print("\nTesting External Sources...")
@@ -1,9 +1,7 @@
-import os
 import re
 from backend.agent_base import BaseAgent, AgentInput, AgentOutput
-from openai import OpenAI
+from backend.llm_client import client
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 class ContentStrategistAgent(BaseAgent):
     def __init__(self):
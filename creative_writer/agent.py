@@ -1,11 +1,12 @@
-import os
+import logging
 import re
 from dotenv import load_dotenv
-from openai import OpenAI
 from backend.agent_base import BaseAgent, AgentInput, AgentOutput
+from backend.llm_client import client
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+logger = logging.getLogger(__name__)
 
 class CreativeWriterAgent(BaseAgent):
     def __init__(self):
@@ -135,7 +136,7 @@ TONE_ANALYSIS:
             return creative_draft, content_sections, tone_analysis
             
         except Exception as e:
-            print(f"Regex parsing error: {e}")
+            logger.warning("Regex parsing error: %s", e)
             return self._fallback_parsing(content)
 
     def _extract_fallback_draft(self, content: str) -> str:
@@ -1,11 +1,9 @@
-import os
 from datetime import datetime
 from dotenv import load_dotenv
-from openai import OpenAI
 from backend.agent_base import BaseAgent, AgentInput, AgentOutput
+from backend.llm_client import client
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 class PublishingAgent(BaseAgent):
     def __init__(self):
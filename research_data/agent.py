@@ -1,18 +1,30 @@
-import os
 import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from dotenv import load_dotenv
 from datetime import datetime
 from backend.agent_base import BaseAgent, AgentInput, AgentOutput
+from backend.llm_client import client
 from backend.research_service import ResearchService
-from openai import OpenAI
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on one research search; past it the agent falls back instead of holding its thread
+RESEARCH_TIMEOUT = float(os.getenv("RESEARCH_TIMEOUT", "60"))
 
 class ResearchDataAgent(BaseAgent):
     def __init__(self):
         super().__init__()
         self.name = "Research & Data Agent"
+        # Research runs on one long-lived loop with one pooled ResearchService, instead of
+        # asyncio.run building a loop and an aiohttp session per call. Workflow threads submit to it.
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="research-agent-loop", daemon=True).start()
+        self._service = None
 
     def get_input_keys(self) -> list:
         return ["content_roadmap", "campaign_theme"]
@@ -36,7 +48,13 @@ class ResearchDataAgent(BaseAgent):
                     "agent": self.name
                 })
 
-            research_results = asyncio.run(self._perform_research(query))
+            future = asyncio.run_coroutine_threadsafe(self._perform_research(query), self._loop)
+            try:
+                research_results = future.result(timeout=RESEARCH_TIMEOUT)
+            except FutureTimeoutError:
+                future.cancel()
+                logger.warning("Research for %r timed out after %ss", query, RESEARCH_TIMEOUT)
+                research_results = {"query": query, "results": [], "error": "Research timed out"}
             results = research_results.get("results", [])
 
             # Fallback to OpenAI web search if no results found
@@ -94,19 +112,38 @@ Return only 2–5 words for searching papers, news, and data.
         except Exception:
             return " ".join(w for w in roadmap.split()[:5] if len(w) > 3)
 
+    def close(self) -> None:
+        """Close the pooled ResearchService and stop the research loop thread"""
+        if self._loop.is_closed():
+            return
+        if self._loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(self._close_service(), self._loop).result(timeout=5)
+            except Exception as e:
+                logger.warning("Could not close ResearchService: %s", e)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    async def _close_service(self) -> None:
+        if self._service is not None:
+            service, self._service = self._service, None
+            await service.__aexit__(None, None, None)
+
     async def _perform_research(self, query: str) -> dict:
         try:
-            async with ResearchService() as service:
-                return await service.search(
-                    query=query,
-                    filters={
-                        'sources': ['academic', 'web', 'statistics'],
-                        'min_relevance': 0.3
-                    },
-                    user_id='research_agent'
-                )
+            if self._service is None:
+                # Assigned before awaiting so concurrent runs on the loop share a single service
+                self._service = ResearchService()
+                await self._service.__aenter__()
+            return await self._service.search(
+                query=query,
+                filters={
+                    'sources': ['academic', 'web', 'statistics'],
+                    'min_relevance': 0.3
+                },
+                user_id='research_agent'
+            )
         except Exception as e:
-            print(f"ResearchService error: {e}")
+            logger.error("ResearchService error: %s", e)
             return {"query": query, "results": [], "error": str(e)}
 
     def _create_research_summary(self, research_results: dict, query: str) -> str: